@@ -1,13 +1,20 @@
 """Local development server mimicking AWS Lambda runtime."""
 
+import importlib.util
 import json
 import os
 import sys
-from importlib import import_module
+import threading
 from typing import Any, Callable, Dict
 
 from shared.logger import StructuredLogger
 
+LambdaHandler = Callable[[Dict[str, Any], Any], Dict[str, Any]]
+
+# Loaded handlers keyed by Lambda directory, so repeat invokes skip import
+_HANDLER_CACHE: Dict[str, LambdaHandler] = {}
+_HANDLER_CACHE_LOCK = threading.Lock()
+
 
 class LocalLambdaContext:
     """Mock Lambda context object."""
@@ -21,16 +28,27 @@ class LocalLambdaContext:
         self.invoked_function_arn = f"arn:aws:lambda:us-east-1:000000000000:function:{function_name}"
 
 
-def load_lambda_handler(lambda_dir: str) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+def load_lambda_handler(lambda_dir: str) -> LambdaHandler:
     """Dynamically load Lambda handler from module."""
     try:
-        # Add lambda directory to path
-        sys.path.insert(0, lambda_dir)
-        sys.path.insert(0, "/app")
-
-        # Import handler module
-        handler_module = import_module("handler")
-        return handler_module.lambda_handler
+        with _HANDLER_CACHE_LOCK:
+            if lambda_dir in _HANDLER_CACHE:
+                return _HANDLER_CACHE[lambda_dir]
+
+            # Add lambda directory to path
+            sys.path.insert(0, lambda_dir)
+            if "/app" not in sys.path:
+                sys.path.insert(0, "/app")
+
+            # Import handler module under a per-function name to avoid collisions
+            module_name = f"handler_{os.path.basename(lambda_dir.rstrip('/'))}"
+            spec = importlib.util.spec_from_file_location(module_name, os.path.join(lambda_dir, "handler.py"))
+            handler_module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = handler_module
+            spec.loader.exec_module(handler_module)
+
+            _HANDLER_CACHE[lambda_dir] = handler_module.lambda_handler
+            return handler_module.lambda_handler
     except Exception as e:
         StructuredLogger.error("Failed to load Lambda handler", exception=e)
         raise
@@ -75,7 +93,7 @@ def invoke_function(function_name: str, event: Dict[str, Any]) -> Dict[str, Any]
 
 def main():
     """Start local development server."""
-    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
     class LambdaRequestHandler(BaseHTTPRequestHandler):
         def do_POST(self):
@@ -111,7 +129,7 @@ def main():
             """Suppress default logging."""
             pass
 
-    server = HTTPServer(("0.0.0.0", 8000), LambdaRequestHandler)
+    server = ThreadingHTTPServer(("0.0.0.0", 8000), LambdaRequestHandler)
     StructuredLogger.info("Local Lambda development server started", port=8000)
 
     try:
@@ -1,20 +1,51 @@
 """AWS service helpers for S3, CloudFront, and SQS."""
 
-import json
-from typing import Dict, List, Optional
+import os
+import posixpath
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from uuid import uuid4
 
 import boto3
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import S3Transfer, TransferConfig
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 
 from shared.errors import CDNInvalidationError, ConfigurationError, S3Error
 from shared.logger import StructuredLogger
+from shared.serialization import dumps
+
+# SQS limit on entries per batch request
+SQS_MAX_BATCH_SIZE = 10
+
+# Connection pool sized above the thumbnail upload concurrency so workers don't queue
+_CLIENT_CONFIG = BotoConfig(max_pool_connections=32)
+
+# boto3 clients reused across warm Lambda invocations, keyed by (service, region)
+_clients: Dict[Tuple[str, str], Any] = {}
+
+
+def _client(service_name: str, region_name: str) -> Any:
+    """Get cached boto3 client, creating it on first use."""
+    client = _clients.get((service_name, region_name))
+    if client is None:
+        client = _clients[(service_name, region_name)] = boto3.client(
+            service_name, region_name=region_name, config=_CLIENT_CONFIG
+        )
+    return client
 
 
 class S3Helper:
     """S3 operations."""
 
     def __init__(self, region_name: str = "us-east-1"):
-        self.client = boto3.client("s3", region_name=region_name)
+        self.client = _client("s3", region_name)
+        # One transfer manager reused for all file transfers on this client
+        self._transfer = S3Transfer(
+            self.client,
+            TransferConfig(use_threads=True, max_concurrency=16, multipart_threshold=64 * 1024 * 1024),
+        )
+        self._transfer_errors = (ClientError, S3UploadFailedError)
 
     def file_exists(self, bucket: str, key: str) -> bool:
         """Check if S3 object exists."""
@@ -26,12 +57,26 @@ class S3Helper:
                 return False
             raise S3Error(f"Error checking S3 object {bucket}/{key}: {str(e)}") from e
 
+    def files_exist(self, bucket: str, keys: List[str]) -> Dict[str, bool]:
+        """Check existence of many S3 objects with one listing of their common prefix."""
+        if not keys:
+            return {}
+
+        # Keys in different directories share too short a prefix (possibly none),
+        # and listing it could page through most of the bucket
+        prefix = os.path.commonprefix(keys)
+        if any(not prefix.startswith(posixpath.dirname(key) + "/") for key in keys):
+            return {key: self.file_exists(bucket, key) for key in keys}
+
+        present = set(self.list_objects(bucket, prefix))
+        return {key: key in present for key in keys}
+
     def download_file(self, bucket: str, key: str, file_path: str) -> None:
         """Download file from S3."""
         try:
             StructuredLogger.info("Downloading S3 file", bucket=bucket, key=key, local_path=file_path)
-            self.client.download_file(bucket, key, file_path)
-        except ClientError as e:
+            self._transfer.download_file(bucket, key, file_path)
+        except self._transfer_errors as e:
             raise S3Error(f"Error downloading {bucket}/{key}: {str(e)}") from e
 
     def upload_file(
@@ -49,29 +94,41 @@ class S3Helper:
                 extra_args["ACL"] = "public-read"
 
             StructuredLogger.info("Uploading to S3", bucket=bucket, key=key, public=public)
-            self.client.upload_file(file_path, bucket, key, ExtraArgs=extra_args)
-        except ClientError as e:
+            self._transfer.upload_file(file_path, bucket, key, extra_args=extra_args)
+        except self._transfer_errors as e:
             raise S3Error(f"Error uploading to {bucket}/{key}: {str(e)}") from e
 
     def put_object(
         self,
         bucket: str,
         key: str,
-        body: str,
+        body: Union[str, bytes],
         content_type: str = "text/plain",
         public: bool = False,
     ) -> None:
         """Put object directly to S3."""
         try:
-            extra_args = {"ContentType": content_type}
-            if public:
-                extra_args["ACL"] = "public-read"
-
             StructuredLogger.info("Putting object to S3", bucket=bucket, key=key, public=public)
-            self.client.put_object(Bucket=bucket, Key=key, Body=body, **extra_args)
+            if public:
+                self.client.put_object(
+                    Bucket=bucket, Key=key, Body=body, ContentType=content_type, ACL="public-read"
+                )
+            else:
+                self.client.put_object(Bucket=bucket, Key=key, Body=body, ContentType=content_type)
         except ClientError as e:
             raise S3Error(f"Error putting object to {bucket}/{key}: {str(e)}") from e
 
+    def upload_bytes(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        content_type: str = "application/octet-stream",
+        public: bool = False,
+    ) -> None:
+        """Upload in-memory bytes to S3 without a temp file."""
+        self.put_object(bucket, key, data, content_type=content_type, public=public)
+
     def get_object(self, bucket: str, key: str) -> str:
         """Get object content from S3."""
         try:
@@ -80,19 +137,39 @@ class S3Helper:
         except ClientError as e:
             raise S3Error(f"Error getting object {bucket}/{key}: {str(e)}") from e
 
-    def list_objects(self, bucket: str, prefix: str) -> List[str]:
-        """List objects with prefix paginator."""
+    def get_object_if_exists(self, bucket: str, key: str) -> Optional[str]:
+        """Get object content from S3, or None if the object does not exist."""
+        try:
+            response = self.client.get_object(Bucket=bucket, Key=key)
+            return response["Body"].read().decode("utf-8")
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise S3Error(f"Error getting object {bucket}/{key}: {str(e)}") from e
+
+    def generate_presigned_url(self, bucket: str, key: str, expires_in: int = 3600) -> str:
+        """Generate pre-signed HTTPS GET URL for S3 object."""
+        try:
+            return self.client.generate_presigned_url(
+                "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=expires_in
+            )
+        except ClientError as e:
+            raise S3Error(f"Error presigning {bucket}/{key}: {str(e)}") from e
+
+    def list_objects(self, bucket: str, prefix: str) -> Iterator[str]:
+        """Yield object keys with prefix, fetching pages lazily."""
+        for key, _ in self.list_object_sizes(bucket, prefix):
+            yield key
+
+    def list_object_sizes(self, bucket: str, prefix: str) -> Iterator[Tuple[str, int]]:
+        """Yield (key, size in bytes) for objects with prefix, fetching pages lazily."""
         try:
-            keys = []
             paginator = self.client.get_paginator("list_objects_v2")
             pages = paginator.paginate(Bucket=bucket, Prefix=prefix)
 
             for page in pages:
-                if "Contents" in page:
-                    for obj in page["Contents"]:
-                        keys.append(obj["Key"])
-
-            return keys
+                for obj in page.get("Contents", ()):
+                    yield obj["Key"], obj["Size"]
         except ClientError as e:
             raise S3Error(f"Error listing objects in {bucket}/{prefix}: {str(e)}") from e
 
@@ -101,7 +178,7 @@ class CloudFrontHelper:
     """CloudFront operations."""
 
     def __init__(self, region_name: str = "us-east-1"):
-        self.client = boto3.client("cloudfront", region_name=region_name)
+        self.client = _client("cloudfront", region_name)
 
     def invalidate_paths(self, distribution_id: str, paths: List[str]) -> str:
         """Invalidate CloudFront cache for given paths."""
@@ -120,7 +197,7 @@ class CloudFrontHelper:
                 DistributionId=distribution_id,
                 InvalidationBatch={
                     "Paths": {"Quantity": len(paths), "Items": paths},
-                    "CallerReference": str(__import__("time").time()),
+                    "CallerReference": uuid4().hex,
                 },
             )
 
@@ -137,7 +214,7 @@ class SQSHelper:
     """SQS operations."""
 
     def __init__(self, region_name: str = "us-east-1"):
-        self.client = boto3.client("sqs", region_name=region_name)
+        self.client = _client("sqs", region_name)
 
     def send_message(self, queue_url: str, message_body: Dict) -> str:
         """Send message to SQS queue."""
@@ -147,7 +224,7 @@ class SQSHelper:
 
             StructuredLogger.info("Sending SQS message", queue_url=queue_url)
 
-            response = self.client.send_message(QueueUrl=queue_url, MessageBody=json.dumps(message_body))
+            response = self.client.send_message(QueueUrl=queue_url, MessageBody=dumps(message_body))
 
             message_id = response["MessageId"]
             StructuredLogger.info("SQS message sent", message_id=message_id, queue_url=queue_url)
@@ -155,6 +232,42 @@ class SQSHelper:
         except ClientError as e:
             raise S3Error(f"Error sending SQS message: {str(e)}") from e
 
+    def send_messages(self, queue_url: str, message_bodies: List[Dict]) -> List[int]:
+        """
+        Send messages to SQS queue in batches of up to 10.
+
+        Returns:
+            Indexes into message_bodies of messages SQS did not accept
+        """
+        try:
+            if not queue_url:
+                raise ConfigurationError("SQS queue URL not provided")
+
+            StructuredLogger.info("Sending SQS messages", queue_url=queue_url, count=len(message_bodies))
+
+            failed = []
+            for i in range(0, len(message_bodies), SQS_MAX_BATCH_SIZE):
+                # Entry Ids are indexes into message_bodies so failures map back to inputs
+                entries = [
+                    {"Id": str(j), "MessageBody": dumps(message_bodies[j])}
+                    for j in range(i, min(i + SQS_MAX_BATCH_SIZE, len(message_bodies)))
+                ]
+                response = self.client.send_message_batch(QueueUrl=queue_url, Entries=entries)
+                if response.get("Failed"):
+                    StructuredLogger.warning(
+                        "Some SQS messages were not sent",
+                        queue_url=queue_url,
+                        failed=response["Failed"],
+                    )
+                    failed.extend(int(entry["Id"]) for entry in response["Failed"])
+
+            StructuredLogger.info(
+                "SQS messages sent", queue_url=queue_url, count=len(message_bodies) - len(failed)
+            )
+            return failed
+        except ClientError as e:
+            raise S3Error(f"Error sending SQS messages: {str(e)}") from e
+
     def delete_message(self, queue_url: str, receipt_handle: str) -> None:
         """Delete message from SQS queue."""
         try:
@@ -162,3 +275,24 @@ class SQSHelper:
             StructuredLogger.info("SQS message deleted", queue_url=queue_url)
         except ClientError as e:
             raise S3Error(f"Error deleting SQS message: {str(e)}") from e
+
+    def delete_messages(self, queue_url: str, entries: List[Dict[str, str]]) -> None:
+        """Delete messages from SQS queue in batches of up to 10."""
+        try:
+            if not queue_url:
+                raise ConfigurationError("SQS queue URL not provided")
+
+            for i in range(0, len(entries), SQS_MAX_BATCH_SIZE):
+                response = self.client.delete_message_batch(
+                    QueueUrl=queue_url, Entries=entries[i : i + SQS_MAX_BATCH_SIZE]
+                )
+                if response.get("Failed"):
+                    StructuredLogger.warning(
+                        "Some SQS messages were not deleted",
+                        queue_url=queue_url,
+                        failed=response["Failed"],
+                    )
+
+            StructuredLogger.info("SQS messages deleted", queue_url=queue_url, count=len(entries))
+        except ClientError as e:
+            raise S3Error(f"Error deleting SQS messages: {str(e)}") from e
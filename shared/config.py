@@ -17,6 +17,7 @@ class Config:
     THUMBNAIL_WIDTH = int(os.environ.get("THUMBNAIL_WIDTH", "320"))
     THUMBNAIL_HEIGHT = int(os.environ.get("THUMBNAIL_HEIGHT", "180"))
     THUMBNAIL_FORMAT = os.environ.get("THUMBNAIL_FORMAT", "jpg")  # jpg or png
+    THUMBNAIL_JPEG_QUALITY = int(os.environ.get("THUMBNAIL_JPEG_QUALITY", "5"))  # FFmpeg -q:v, 2 (best) - 31
 
     # Thumbnail file naming
     THUMBNAIL_SMALL_RESOLUTION = f"{THUMBNAIL_WIDTH}x{THUMBNAIL_HEIGHT}"
@@ -26,6 +27,11 @@ class Config:
     THUMBNAIL_BIG_RESOLUTION = f"{THUMBNAIL_BIG_WIDTH}x{THUMBNAIL_BIG_HEIGHT}"
     THUMBNAIL_BIG_SUFFIX = "_big"
 
+    # Sprite layout: NxN thumbnails per image, 1 for single thumbnails. Defaults give
+    # 3200x1800 sprites at both resolutions.
+    THUMBNAIL_TILE_GRID = int(os.environ.get("THUMBNAIL_TILE_GRID", "10"))
+    THUMBNAIL_BIG_TILE_GRID = int(os.environ.get("THUMBNAIL_BIG_TILE_GRID", "5"))
+
     # Bandwidth for HLS (bits per second)
     THUMBNAIL_SMALL_BANDWIDTH = int(os.environ.get("THUMBNAIL_SMALL_BANDWIDTH", "16460"))
     THUMBNAIL_BIG_BANDWIDTH = int(os.environ.get("THUMBNAIL_BIG_BANDWIDTH", "32920"))
@@ -41,13 +47,20 @@ class Config:
     ENABLE_SLACK_NOTIFICATIONS = os.environ.get("ENABLE_SLACK_NOTIFICATIONS", "False").lower() == "true"
     SLACK_WEBHOOK_URL = os.environ.get("SLACK_WEBHOOK_URL")
 
+    # Environment is fixed for the container lifetime, so validate once
+    _validated = False
+
     @classmethod
     def validate(cls) -> bool:
         """Validate required configuration is set."""
+        if cls._validated:
+            return True
+
         required = ["AWS_S3_BUCKET", "AWS_CLOUDFRONT_DISTRIBUTION_ID"]
         missing = [var for var in required if not getattr(cls, var, None)]
 
         if missing:
             raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
 
+        cls._validated = True
         return True
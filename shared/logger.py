@@ -1,42 +1,123 @@
-import json
 import logging
+import os
+import time
 from typing import Any, Dict
 
+from shared.serialization import dumps
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
+class JsonFormatter(logging.Formatter):
+    """Serialize log records as single-line JSON for CloudWatch."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+        timestamp = f"{timestamp}.{int(record.msecs):03d}Z"
+        # Set on every record by the Lambda runtime's log filter
+        aws_request_id = record.__dict__.get("aws_request_id")
+
+        structured = record.__dict__.get("structured")
+        if not structured:
+            # Common case: no extra fields, build the fixed-key JSON directly
+            request_id = f',"aws_request_id":{dumps(aws_request_id)}' if aws_request_id else ""
+            return (
+                f'{{"timestamp":"{timestamp}","level":"{record.levelname}",'
+                f'"message":{dumps(record.getMessage())}{request_id}}}'
+            )
+
+        log_data = {
+            "timestamp": timestamp,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if aws_request_id:
+            log_data["aws_request_id"] = aws_request_id
+        log_data.update(structured)
+        return dumps(log_data)
+
+
+class FlatStructuredFormatter(logging.Formatter):
+    """
+    Wrap another formatter, lifting structured fields onto the record.
+
+    The Lambda runtime's JSON formatter copies extra record attributes as-is,
+    so without this every field would be nested under "structured" instead
+    of being top-level as JsonFormatter writes them.
+    """
+
+    def __init__(self, formatter: logging.Formatter):
+        super().__init__()
+        self.formatter = formatter
+
+    def format(self, record: logging.LogRecord) -> str:
+        structured = record.__dict__.pop("structured", None)
+        if structured:
+            for key, value in structured.items():
+                # Never overwrite standard LogRecord attributes
+                record.__dict__.setdefault(key, value)
+        return self.formatter.format(record)
+
+
+def _configure_handlers() -> None:
+    """
+    Attach JsonFormatter to root handlers (adding one if none exist).
+
+    When Lambda's JSON log format is enabled the runtime formatter already
+    emits JSON (with timestamp and requestId), so it is kept and only
+    wrapped to keep the same top-level field layout.
+    """
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+    elif os.environ.get("AWS_LAMBDA_LOG_FORMAT") == "JSON":
+        for handler in logger.handlers:
+            if handler.formatter and not isinstance(handler.formatter, FlatStructuredFormatter):
+                handler.setFormatter(FlatStructuredFormatter(handler.formatter))
+        return
+
+    for handler in logger.handlers:
+        handler.setFormatter(JsonFormatter())
+
+
+_configure_handlers()
+
+
 class StructuredLogger:
     """Structured logging for CloudWatch JSON parsing."""
 
     @staticmethod
     def info(message: str, **kwargs) -> None:
         """Log info level with structured data."""
-        log_data = {"level": "INFO", "message": message, **kwargs}
-        logger.info(json.dumps(log_data))
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
+        logger.info(message, extra={"structured": kwargs})
 
     @staticmethod
     def error(message: str, exception: Exception = None, **kwargs) -> None:
         """Log error level with exception details."""
-        log_data = {
-            "level": "ERROR",
-            "message": message,
-            **kwargs,
-        }
+        if not logger.isEnabledFor(logging.ERROR):
+            return
+
         if exception:
-            log_data["exception"] = str(exception)
-            log_data["exception_type"] = type(exception).__name__
+            kwargs["exception"] = str(exception)
+            kwargs["exception_type"] = type(exception).__name__
 
-        logger.error(json.dumps(log_data))
+        logger.error(message, extra={"structured": kwargs})
 
     @staticmethod
     def warning(message: str, **kwargs) -> None:
         """Log warning level with structured data."""
-        log_data = {"level": "WARNING", "message": message, **kwargs}
-        logger.warning(json.dumps(log_data))
+        if not logger.isEnabledFor(logging.WARNING):
+            return
+
+        logger.warning(message, extra={"structured": kwargs})
 
     @staticmethod
     def debug(message: str, **kwargs) -> None:
         """Log debug level with structured data."""
-        log_data = {"level": "DEBUG", "message": message, **kwargs}
-        logger.debug(json.dumps(log_data))
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        logger.debug(message, extra={"structured": kwargs})
@@ -0,0 +1,19 @@
+"""JSON serialization helpers (orjson when available, stdlib otherwise)."""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    def dumps(obj: Any) -> str:
+        """Serialize object to JSON string."""
+        return orjson.dumps(obj).decode("utf-8")
+
+    loads = orjson.loads
+except ImportError:  # pragma: no cover - stdlib fallback
+    def dumps(obj: Any) -> str:
+        """Serialize object to JSON string."""
+        return json.dumps(obj)
+
+    loads = json.loads
@@ -1,12 +1,18 @@
 """Lambda handler for cache invalidation."""
 
 import json
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
 from shared.config import Config
 from shared.errors import CDNInvalidationError, TrickPlayError
 from shared.logger import StructuredLogger
-from invalidator import CacheInvalidator
+from shared.serialization import dumps, loads
+from invalidator import MAX_INVALIDATION_PATHS, CacheInvalidator
+
+_invalidator = CacheInvalidator(region_name=Config.AWS_REGION)
+
+# Constant response body for unexpected errors
+_ERR_500 = dumps({"error": "Internal server error"})
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -24,17 +30,24 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         ],
         "request_id": "..."
     }
+
+    Records whose invalidation fails are returned in batchItemFailures, so the
+    event source mapping must enable ReportBatchItemFailures for SQS to
+    redeliver them.
     """
     try:
         StructuredLogger.info("Cache invalidator lambda invoked", request_id=context.request_id)
 
         Config.validate()
 
-        # Process each SQS record
+        dist_id = Config.AWS_CLOUDFRONT_DISTRIBUTION_ID
+
+        # Collect paths from every SQS record so the batch needs one invalidation
+        records = []
         for record in event.get("Records", []):
             try:
-                message_body = json.loads(record["body"])
-                receipt_handle = record["receiptHandle"]
+                message_body = loads(record["body"])
+                message_id = record["messageId"]
 
                 media_key = message_body.get("media_key")
                 paths = message_body.get("paths_to_invalidate", [])
@@ -46,18 +59,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     request_id=context.request_id,
                 )
 
-                # Invalidate cache
-                invalidator = CacheInvalidator(region_name=Config.AWS_REGION)
-                invalidation_id = invalidator.invalidate_cache(
-                    paths=paths,
-                    distribution_id=Config.AWS_CLOUDFRONT_DISTRIBUTION_ID,
-                )
-
-                StructuredLogger.info(
-                    "Cache invalidation succeeded",
-                    media_key=media_key,
-                    invalidation_id=invalidation_id,
-                )
+                records.append((media_key, message_id, paths))
 
             except json.JSONDecodeError as e:
                 StructuredLogger.error(
@@ -72,9 +74,41 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     request_id=context.request_id,
                 )
 
+        # Dedupe while keeping first-seen order
+        all_paths = list(dict.fromkeys(path for _, _, paths in records for path in paths))
+
+        failed_ids = []
+        if all_paths:
+            try:
+                invalidation_ids = [
+                    _invalidator.invalidate_cache(
+                        paths=all_paths[i : i + MAX_INVALIDATION_PATHS],
+                        distribution_id=dist_id,
+                    )
+                    for i in range(0, len(all_paths), MAX_INVALIDATION_PATHS)
+                ]
+
+                for media_key, _, _ in records:
+                    StructuredLogger.info(
+                        "Cache invalidation succeeded",
+                        media_key=media_key,
+                        invalidation_ids=invalidation_ids,
+                    )
+
+            except Exception as e:
+                StructuredLogger.error(
+                    "Error invalidating cache for SQS batch, retrying per record",
+                    exception=e,
+                    media_keys=[media_key for media_key, _, _ in records],
+                    request_id=context.request_id,
+                )
+                # Isolate the failing records so only they are redelivered
+                failed_ids = _invalidate_per_record(records, dist_id, context.request_id)
+
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "Cache invalidation completed"}),
+            "body": dumps({"message": "Cache invalidation completed"}),
+            "batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed_ids],
         }
 
     except TrickPlayError as e:
@@ -85,7 +119,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         return {
             "statusCode": 400,
-            "body": json.dumps({"error": str(e)}),
+            "body": dumps({"error": str(e)}),
         }
     except Exception as e:
         StructuredLogger.error(
@@ -95,5 +129,40 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         return {
             "statusCode": 500,
-            "body": json.dumps({"error": "Internal server error"}),
+            "body": _ERR_500,
         }
+
+
+def _invalidate_per_record(
+    records: List[Tuple[str, str, List[str]]],
+    dist_id: str,
+    request_id: str,
+) -> List[str]:
+    """
+    Invalidate each record's paths separately.
+
+    Returns:
+        SQS message IDs of records whose invalidation failed
+    """
+    failed_ids = []
+    for media_key, message_id, paths in records:
+        if not paths:
+            continue
+        try:
+            invalidation_id = _invalidator.invalidate_cache(paths=paths, distribution_id=dist_id)
+
+            StructuredLogger.info(
+                "Cache invalidation succeeded",
+                media_key=media_key,
+                invalidation_id=invalidation_id,
+            )
+        except Exception as e:
+            StructuredLogger.error(
+                "Error invalidating cache for SQS record",
+                exception=e,
+                media_key=media_key,
+                request_id=request_id,
+            )
+            failed_ids.append(message_id)
+
+    return failed_ids
@@ -7,6 +7,9 @@ from shared.config import Config
 from shared.errors import CDNInvalidationError
 from shared.logger import StructuredLogger
 
+# CloudFront limit on paths per invalidation batch
+MAX_INVALIDATION_PATHS = 3000
+
 
 class CacheInvalidator:
     """Invalidate CloudFront cache for trick play assets."""
@@ -1,14 +1,26 @@
 """Lambda handler for manifest update."""
 
 import json
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 
 from shared.aws_helpers import SQSHelper
 from shared.config import Config
 from shared.errors import ManifestGenerationError, TrickPlayError
 from shared.logger import StructuredLogger
+from shared.serialization import dumps, loads
 from updater import ManifestUpdater
 
+_updater = ManifestUpdater(region_name=Config.AWS_REGION)
+_sqs = SQSHelper(region_name=Config.AWS_REGION)
+
+# Sized to the max SQS batch size; reused across warm invocations
+_POOL = ThreadPoolExecutor(max_workers=10)
+
+# Constant response body for unexpected errors
+_ERR_500 = dumps({"error": "Internal server error"})
+
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -21,73 +33,62 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         "hls_url": "s3://bucket/content/video123/play.m3u8",
         "small_thumbnails": [...],
         "big_thumbnails": [...],
+        "duration": 5400.0,
         "request_id": "..."
     }
+
+    Records that fail processing, or whose invalidation message SQS rejects,
+    are returned in batchItemFailures, so the event source mapping must
+    enable ReportBatchItemFailures for SQS to redeliver them.
     """
     try:
         StructuredLogger.info("Manifest updater lambda invoked", request_id=context.request_id)
 
         Config.validate()
 
-        # Process each SQS record
-        for record in event.get("Records", []):
-            try:
-                message_body = json.loads(record["body"])
-                receipt_handle = record["receiptHandle"]
+        bucket = Config.AWS_S3_BUCKET
+        man_q = Config.SQS_MANIFEST_QUEUE_URL
+        inv_q = Config.SQS_CACHE_INVALIDATION_QUEUE_URL
 
-                StructuredLogger.info(
-                    "Processing manifest update",
-                    media_key=message_body.get("media_key"),
-                    request_id=context.request_id,
-                )
+        # Records are independent and I/O bound, so process them concurrently
+        records = event.get("Records", [])
+        results = _POOL.map(lambda record: _process_record(record, context.request_id, bucket), records)
 
-                # Update manifests
-                updater = ManifestUpdater(region_name=Config.AWS_REGION)
-                results = updater.create_manifests_and_update_playlist(
-                    bucket=Config.AWS_S3_BUCKET,
-                    media_path=message_body["media_path"],
-                    hls_url=message_body["hls_url"],
-                    small_thumbnails=message_body.get("small_thumbnails", []),
-                    big_thumbnails=message_body.get("big_thumbnails", []),
-                )
+        # Failed records are reported back so SQS redelivers them
+        processed, failed_ids = [], []
+        for record, invalidation_message in zip(records, results):
+            if invalidation_message:
+                processed.append((record, invalidation_message))
+            else:
+                failed_ids.append(record.get("messageId"))
 
-                # Publish to SQS for cache invalidation
-                sqs = SQSHelper(region_name=Config.AWS_REGION)
-                invalidation_message = {
-                    "media_key": message_body["media_key"],
-                    "media_path": message_body["media_path"],
-                    "paths_to_invalidate": _build_invalidation_paths(message_body["media_path"]),
-                    "request_id": context.request_id,
-                }
-
-                if Config.SQS_CACHE_INVALIDATION_QUEUE_URL:
-                    sqs.send_message(Config.SQS_CACHE_INVALIDATION_QUEUE_URL, invalidation_message)
-
-                # Delete message from SQS
-                sqs.delete_message(Config.SQS_MANIFEST_QUEUE_URL, receipt_handle)
-
-                StructuredLogger.info(
-                    "Manifest update succeeded",
-                    media_key=message_body.get("media_key"),
-                    results=results,
-                )
-
-            except json.JSONDecodeError as e:
-                StructuredLogger.error(
-                    "Invalid SQS message format",
-                    exception=e,
-                    request_id=context.request_id,
-                )
+        # Publish to SQS for cache invalidation in batches
+        if inv_q and processed:
+            try:
+                rejected = set(_sqs.send_messages(inv_q, [message for _, message in processed]))
             except Exception as e:
                 StructuredLogger.error(
-                    "Error processing SQS record",
+                    "Error sending cache invalidation messages",
                     exception=e,
                     request_id=context.request_id,
                 )
+                rejected = set(range(len(processed)))
+
+            failed_ids.extend(record.get("messageId") for i, (record, _) in enumerate(processed) if i in rejected)
+            processed = [result for i, result in enumerate(processed) if i not in rejected]
+
+        # Delete successfully processed messages from SQS in batches
+        entries = [
+            {"Id": str(i), "ReceiptHandle": record["receiptHandle"]}
+            for i, (record, _) in enumerate(processed)
+        ]
+        if entries:
+            _sqs.delete_messages(man_q, entries)
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "Manifests updated successfully"}),
+            "body": dumps({"message": "Manifests updated successfully"}),
+            "batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed_ids],
         }
 
     except TrickPlayError as e:
@@ -98,7 +99,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         return {
             "statusCode": 400,
-            "body": json.dumps({"error": str(e)}),
+            "body": dumps({"error": str(e)}),
         }
     except Exception as e:
         StructuredLogger.error(
@@ -108,15 +109,78 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         return {
             "statusCode": 500,
-            "body": json.dumps({"error": "Internal server error"}),
+            "body": _ERR_500,
         }
 
 
-def _build_invalidation_paths(media_path: str) -> list:
-    """Build CloudFront invalidation paths."""
-    return [
+def _process_record(
+    record: Dict[str, Any],
+    request_id: str,
+    bucket: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Update manifests for a single SQS record.
+
+    Returns:
+        Cache invalidation message on success, None otherwise
+    """
+    try:
+        message_body = loads(record["body"])
+
+        StructuredLogger.info(
+            "Processing manifest update",
+            media_key=message_body.get("media_key"),
+            request_id=request_id,
+        )
+
+        # Update manifests
+        results = _updater.create_manifests_and_update_playlist(
+            bucket=bucket,
+            media_path=message_body["media_path"],
+            hls_url=message_body["hls_url"],
+            small_thumbnails=message_body.get("small_thumbnails", []),
+            big_thumbnails=message_body.get("big_thumbnails", []),
+            duration=message_body.get("duration"),
+        )
+
+        # Cache invalidation message, sent in batch by the handler
+        invalidation_message = {
+            "media_key": message_body["media_key"],
+            "media_path": message_body["media_path"],
+            "paths_to_invalidate": _build_invalidation_paths(message_body["media_path"]),
+            "request_id": request_id,
+        }
+
+        StructuredLogger.info(
+            "Manifest update succeeded",
+            media_key=message_body.get("media_key"),
+            results=results,
+        )
+
+        return invalidation_message
+
+    except json.JSONDecodeError as e:
+        StructuredLogger.error(
+            "Invalid SQS message format",
+            exception=e,
+            request_id=request_id,
+        )
+    except Exception as e:
+        StructuredLogger.error(
+            "Error processing SQS record",
+            exception=e,
+            request_id=request_id,
+        )
+
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _build_invalidation_paths(media_path: str) -> Tuple[str, ...]:
+    """Build CloudFront invalidation paths (immutable, since results are cached)."""
+    return (
         f"/{media_path}play.m3u8",
         f"/{media_path}thumbs_320x180.m3u8",
         f"/{media_path}thumbs_640x360.m3u8",
         f"/{media_path}thumbs/*",
-    ]
+    )
@@ -1,6 +1,7 @@
 """Manifest Updater - Refactored TrickPlayManager for Lambda."""
 
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from shared.aws_helpers import S3Helper
 from shared.config import Config
@@ -22,10 +23,15 @@ class ManifestUpdater:
         hls_url: str,
         small_thumbnails: List[str],
         big_thumbnails: List[str],
+        duration: Optional[float] = None,
     ) -> Dict[str, str]:
         """
         Create trick play M3U8 manifests and update main playlist.
 
+        Args:
+            duration: Media duration in seconds, used to shorten the last sprite's
+                EXTINF; without it every sprite is listed at full length
+
         Returns:
             Dict with status messages for each resolution
         """
@@ -37,31 +43,42 @@ class ManifestUpdater:
                 big_count=len(big_thumbnails),
             )
 
-            results = {}
-
-            # Create small resolution manifest
-            if small_thumbnails:
-                results["small"] = self._create_manifest(
-                    bucket=bucket,
-                    media_path=media_path,
-                    hls_url=hls_url,
-                    thumbnails=small_thumbnails,
-                    resolution=self.config.THUMBNAIL_SMALL_RESOLUTION,
-                    bandwidth=self.config.THUMBNAIL_SMALL_BANDWIDTH,
-                    suffix="small",
-                )
-
-            # Create big resolution manifest
-            if big_thumbnails:
-                results["big"] = self._create_manifest(
-                    bucket=bucket,
-                    media_path=media_path,
-                    hls_url=hls_url,
-                    thumbnails=big_thumbnails,
-                    resolution=self.config.THUMBNAIL_BIG_RESOLUTION,
-                    bandwidth=self.config.THUMBNAIL_BIG_BANDWIDTH,
-                    suffix="big",
-                )
+            # Resolutions are independent, so create their manifests concurrently
+            streams = []
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = {}
+
+                # Create small resolution manifest
+                if small_thumbnails:
+                    futures["small"] = executor.submit(
+                        self._create_manifest,
+                        bucket=bucket,
+                        media_path=media_path,
+                        thumbnails=small_thumbnails,
+                        resolution=self.config.THUMBNAIL_SMALL_RESOLUTION,
+                        grid=self.config.THUMBNAIL_TILE_GRID,
+                        duration=duration,
+                    )
+                    streams.append((self.config.THUMBNAIL_SMALL_BANDWIDTH, self.config.THUMBNAIL_SMALL_RESOLUTION))
+
+                # Create big resolution manifest
+                if big_thumbnails:
+                    futures["big"] = executor.submit(
+                        self._create_manifest,
+                        bucket=bucket,
+                        media_path=media_path,
+                        thumbnails=big_thumbnails,
+                        resolution=self.config.THUMBNAIL_BIG_RESOLUTION,
+                        grid=self.config.THUMBNAIL_BIG_TILE_GRID,
+                        duration=duration,
+                    )
+                    streams.append((self.config.THUMBNAIL_BIG_BANDWIDTH, self.config.THUMBNAIL_BIG_RESOLUTION))
+
+                results = {name: future.result() for name, future in futures.items()}
+
+            # Add all image streams to main playlist in one read-modify-write
+            if streams:
+                self._update_main_playlist(bucket, hls_url, streams)
 
             StructuredLogger.info(
                 "Manifests created successfully",
@@ -83,43 +100,51 @@ class ManifestUpdater:
         self,
         bucket: str,
         media_path: str,
-        hls_url: str,
         thumbnails: List[str],
         resolution: str,
-        bandwidth: int,
-        suffix: str,
+        grid: int,
+        duration: Optional[float] = None,
     ) -> str:
         """Create M3U8 manifest for single resolution."""
         try:
             # Determine relative path (whether in hls/ subfolder or not)
             relative_path = "../thumbs/" if "hls/" in media_path else "thumbs/"
 
-            # Build manifest content
-            manifest_lines = [
-                "#EXTM3U",
-                f"#EXT-X-TARGETDURATION:{self.config.THUMBNAIL_INTERVAL}",
-                "#EXT-X-VERSION:7",
-                "#EXT-X-MEDIA-SEQUENCE:1",
-                "#EXT-X-PLAYLIST-TYPE:VOD",
-                "#EXT-X-IMAGES-ONLY",
-                "",
-            ]
-
-            # Add entries for each thumbnail
-            for thumbnail_key in thumbnails:
-                thumbnail_name = thumbnail_key.split("/")[-1]
-                manifest_lines.append(f"#EXTINF:{self.config.THUMBNAIL_INTERVAL}.000,")
-                manifest_lines.append(
-                    f"#EXT-X-TILES:RESOLUTION={resolution},LAYOUT=1x1,DURATION={self.config.THUMBNAIL_INTERVAL}.000"
-                )
-                manifest_lines.append(f"{relative_path}{thumbnail_name}")
-                manifest_lines.append("")
+            # Each image is a GRIDxGRID sprite of tiles one interval apart; tag lines
+            # are the same for every image, so build them once
+            interval = self.config.THUMBNAIL_INTERVAL
+            image_duration = interval * grid * grid
+            extinf_line = f"#EXTINF:{image_duration}.000,"
+            tile_line = f"#EXT-X-TILES:RESOLUTION={resolution},LAYOUT={grid}x{grid},DURATION={interval}.000"
 
-            manifest_lines.append("#EXT-X-ENDLIST")
-            manifest_content = "\n".join(manifest_lines)
+            # The last sprite is padded with blank tiles past the end of the media
+            last_extinf_line = extinf_line
+            if duration:
+                remaining = duration - (len(thumbnails) - 1) * image_duration
+                if 0 < remaining < image_duration:
+                    last_extinf_line = f"#EXTINF:{remaining:.3f},"
+
+            # Build manifest content
+            header = "\n".join(
+                [
+                    "#EXTM3U",
+                    f"#EXT-X-TARGETDURATION:{image_duration}",
+                    "#EXT-X-VERSION:7",
+                    "#EXT-X-MEDIA-SEQUENCE:1",
+                    "#EXT-X-PLAYLIST-TYPE:VOD",
+                    "#EXT-X-IMAGES-ONLY",
+                ]
+            )
+            last = len(thumbnails) - 1
+            entries = "".join(
+                f"{last_extinf_line if i == last else extinf_line}\n{tile_line}\n"
+                f"{relative_path}{thumbnail_key.rsplit('/', 1)[-1]}\n\n"
+                for i, thumbnail_key in enumerate(thumbnails)
+            )
+            manifest_content = f"{header}\n\n{entries}#EXT-X-ENDLIST"
 
             # Upload manifest
-            manifest_filename = f"thumbs_{resolution}.m3u8"
+            manifest_filename = _manifest_filename(resolution)
             manifest_key = f"{media_path}{manifest_filename}"
 
             self.s3.put_object(
@@ -130,9 +155,6 @@ class ManifestUpdater:
                 public=True,
             )
 
-            # Update main playlist with image stream
-            self._update_main_playlist(bucket, media_path, hls_url, manifest_filename, resolution, bandwidth)
-
             StructuredLogger.info(
                 "Manifest created",
                 media_path=media_path,
@@ -153,47 +175,46 @@ class ManifestUpdater:
     def _update_main_playlist(
         self,
         bucket: str,
-        media_path: str,
         hls_url: str,
-        manifest_filename: str,
-        resolution: str,
-        bandwidth: int,
+        streams: List[Tuple[int, str]],
     ) -> None:
-        """Add image stream to main HLS playlist."""
+        """
+        Add image streams to main HLS playlist with a single GET and PUT.
+
+        Args:
+            streams: List of (bandwidth, resolution) for each trick play manifest
+        """
+        resolutions = [resolution for _, resolution in streams]
+
         try:
             # Get current main playlist
             playlist_key = hls_url.replace("s3://", "").split("/", 1)[1]
             playlist_content = self.s3.get_object(bucket, playlist_key)
 
-            # Check if already updated
-            if manifest_filename in playlist_content:
+            # Skip streams already present
+            image_stream_lines = "".join(
+                f'#EXT-X-IMAGE-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={resolution},'
+                f'CODECS="jpeg",URI="{_manifest_filename(resolution)}"\n'
+                for bandwidth, resolution in streams
+                if _manifest_filename(resolution) not in playlist_content
+            )
+
+            if not image_stream_lines:
                 StructuredLogger.info(
                     "Playlist already updated",
                     playlist_key=playlist_key,
-                    resolution=resolution,
+                    resolutions=resolutions,
                 )
                 return
 
-            # Add image stream line
-            image_stream_line = (
-                f'#EXT-X-IMAGE-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={resolution},'
-                f'CODECS="jpeg",URI="{manifest_filename}"\n'
-            )
+            # Insert before first #EXT-X-STREAM-INF, else before #EXT-X-ENDLIST, else at end
+            insert_at = playlist_content.find("#EXT-X-STREAM-INF")
+            if insert_at == -1:
+                insert_at = playlist_content.find("#EXT-X-ENDLIST")
+            if insert_at == -1:
+                insert_at = len(playlist_content)
 
-            # Insert before #EXT-X-STREAM-INF (if exists) or at end
-            if "#EXT-X-STREAM-INF" in playlist_content:
-                # Insert before first STREAM-INF
-                updated_content = playlist_content.replace(
-                    "#EXT-X-STREAM-INF",
-                    image_stream_line + "#EXT-X-STREAM-INF",
-                    1,
-                )
-            else:
-                # Append before #EXT-X-ENDLIST
-                updated_content = playlist_content.replace(
-                    "#EXT-X-ENDLIST",
-                    image_stream_line + "#EXT-X-ENDLIST",
-                )
+            updated_content = playlist_content[:insert_at] + image_stream_lines + playlist_content[insert_at:]
 
             # Upload updated playlist
             self.s3.put_object(
@@ -207,13 +228,18 @@ class ManifestUpdater:
             StructuredLogger.info(
                 "Playlist updated",
                 playlist_key=playlist_key,
-                resolution=resolution,
+                resolutions=resolutions,
             )
 
         except Exception as e:
             StructuredLogger.error(
                 "Playlist update failed",
-                resolution=resolution,
+                resolutions=resolutions,
                 exception=e,
             )
             raise
+
+
+def _manifest_filename(resolution: str) -> str:
+    """Trick play manifest filename for resolution."""
+    return f"thumbs_{resolution}.m3u8"
@@ -2,14 +2,204 @@
 
 import json
 import os
+import posixpath
+import re
+import shutil
 import subprocess
 import tempfile
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 
 from shared.aws_helpers import S3Helper
 from shared.config import Config
-from shared.errors import FFMpegError
+from shared.errors import FFMpegError, S3Error
 from shared.logger import StructuredLogger
+from shared.serialization import dumps, loads
+
+# S3 PUT throughput saturates around 16 concurrent uploads
+UPLOAD_WORKERS = 16
+
+# Parallel S3 GETs used to prefetch HLS segments
+SEGMENT_DOWNLOAD_WORKERS = 16
+
+# Share of free /tmp space segments may use before FFmpeg streams them from S3 instead
+SEGMENT_DISK_FRACTION = 0.9
+
+# URI="..." attributes in HLS tags (#EXT-X-MAP, #EXT-X-KEY)
+_URI_ATTR_RE = re.compile(r'URI="([^"]+)"')
+
+# Segment duration in #EXTINF and sub-range length in #EXT-X-BYTERANGE
+_EXTINF_RE = re.compile(r"^#EXTINF:([\d.]+)", re.MULTILINE)
+_BYTERANGE_RE = re.compile(r"^#EXT-X-BYTERANGE:(\d+)", re.MULTILINE)
+
+# BANDWIDTH and RESOLUTION height in #EXT-X-STREAM-INF
+_STREAM_BANDWIDTH_RE = re.compile(r"[:,]BANDWIDTH=(\d+)")
+_STREAM_RESOLUTION_RE = re.compile(r"RESOLUTION=\d+x(\d+)")
+
+# Protocols FFmpeg may use to read the local playlist and prefetched segments
+PROTOCOL_WHITELIST = "file,crypto,http,https,tcp,tls"
+
+# HLS demuxer options for the local playlist: prefetched files keep their source
+# extension (.key or none for AES-128 keys), which the default list rejects
+HLS_INPUT_OPTIONS = ["-protocol_whitelist", PROTOCOL_WHITELIST, "-allowed_extensions", "ALL"]
+
+# Keyframe cadence is probed over this many thumbnail intervals of input
+KEYFRAME_PROBE_INTERVALS = 6
+
+# Seconds before a stuck keyframe probe is abandoned
+KEYFRAME_PROBE_TIMEOUT = 30
+
+# Max distance in seconds between a sample point and the keyframe standing in for it
+KEYFRAME_TOLERANCE = 0.05
+
+# Bytes of FFmpeg stderr kept for error reporting
+FFMPEG_STDERR_TAIL = 4096
+
+# image2pipe codec, end-of-image marker and content type per thumbnail format
+_PIPE_FORMATS = {
+    "jpg": ("mjpeg", b"\xff\xd9", "image/jpeg"),
+    "png": ("png", b"IEND\xaeB`\x82", "image/png"),
+}
+
+
+def _iter_frames(stream: BinaryIO, end_marker: bytes, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield complete images from a concatenated image stream."""
+    buffer = bytearray()
+    while True:
+        chunk = stream.read1(chunk_size)
+        if not chunk:
+            break
+        search_from = max(len(buffer) - len(end_marker) + 1, 0)
+        buffer += chunk
+
+        end = buffer.find(end_marker, search_from)
+        while end != -1:
+            frame_end = end + len(end_marker)
+            yield bytes(buffer[:frame_end])
+            del buffer[:frame_end]
+            end = buffer.find(end_marker)
+
+
+def _resolve_key(base_dir: str, uri: str) -> str:
+    """Resolve playlist-relative URI to S3 key."""
+    return posixpath.normpath(posixpath.join(base_dir, uri))
+
+
+def _rewrite_uris(content: str, rewrite: Callable[[str], str]) -> str:
+    """
+    Apply rewrite to every relative URI in a playlist.
+
+    Covers URI lines and URI="..." tag attributes (#EXT-X-MAP, #EXT-X-KEY);
+    absolute URIs are left as they are.
+    """
+
+    def resolve(uri: str) -> str:
+        return uri if "://" in uri else rewrite(uri)
+
+    lines = []
+    for line in content.splitlines():
+        if not line.strip():
+            lines.append(line)
+        elif line.startswith("#"):
+            lines.append(_URI_ATTR_RE.sub(lambda m: f'URI="{resolve(m.group(1))}"', line))
+        else:
+            lines.append(resolve(line.strip()))
+
+    return "\n".join(lines) + "\n"
+
+
+def _select_variant(master_content: str, min_height: int) -> Tuple[str, int]:
+    """
+    Pick variant playlist from master playlist as (uri, bandwidth).
+
+    Uses the lowest-bandwidth rendition that is at least min_height tall
+    (least data to download without upscaling), falling back to the
+    highest-bandwidth rendition, e.g. when no variant declares RESOLUTION.
+    """
+    variants = []
+    lines = master_content.splitlines()
+    for i, line in enumerate(lines):
+        if not line.startswith("#EXT-X-STREAM-INF"):
+            continue
+        uri = next((candidate.strip() for candidate in lines[i + 1 :] if candidate.strip()), None)
+        if not uri or uri.startswith("#"):
+            continue
+        bandwidth = _STREAM_BANDWIDTH_RE.search(line)
+        resolution = _STREAM_RESOLUTION_RE.search(line)
+        variants.append(
+            (
+                int(bandwidth.group(1)) if bandwidth else 0,
+                int(resolution.group(1)) if resolution else 0,
+                uri,
+            )
+        )
+
+    if not variants:
+        raise FFMpegError("No variant playlists found in master playlist")
+
+    large_enough = [v for v in variants if v[1] >= min_height]
+    bandwidth, _, uri = min(large_enough) if large_enough else max(variants)
+    return uri, bandwidth
+
+
+def _estimate_media_bytes(content: str, bandwidth: int, duration: float) -> Optional[int]:
+    """
+    Estimate bytes of a media playlist's segments without requesting them.
+
+    Sums #EXT-X-BYTERANGE lengths when present, else uses the variant's peak
+    BANDWIDTH over the media duration (an overestimate). None if unknown.
+    """
+    ranges = _BYTERANGE_RE.findall(content)
+    if ranges:
+        return sum(int(length) for length in ranges)
+    if bandwidth:
+        return int(bandwidth * duration / 8)
+    return None
+
+
+def _keyframes_cover_samples(times: List[float], interval: float) -> bool:
+    """
+    Check whether a keyframe falls on every sample point in the probed window.
+
+    The fps filter anchors its sampling grid at the first frame, not at PTS 0
+    (MPEG-TS output usually starts later), so sample points are measured from
+    the first keyframe.
+    """
+    if len(times) < 2:
+        return False
+
+    start = times[0]
+    samples = int((times[-1] - start + KEYFRAME_TOLERANCE) // interval)
+    if samples < 1:
+        return False
+
+    i = 0
+    for k in range(1, samples + 1):
+        target = start + k * interval
+        while times[i] < target - KEYFRAME_TOLERANCE:
+            i += 1
+        if times[i] > target + KEYFRAME_TOLERANCE:
+            return False
+
+    return True
+
+
+def _tile_filter(grid: int) -> str:
+    """FFmpeg tile filter suffix for GRIDxGRID sprites, empty for single thumbnails."""
+    return f",tile={grid}x{grid}" if grid > 1 else ""
+
+
+def _playlist_duration(content: str) -> float:
+    """Total media duration in seconds: sum of #EXTINF durations in a media playlist."""
+    return sum(float(match.group(1)) for match in _EXTINF_RE.finditer(content))
+
+
+def _read_tail(stream: BinaryIO, limit: int = FFMPEG_STDERR_TAIL) -> bytes:
+    """Drain stream, keeping only its last limit bytes."""
+    tail = b""
+    for chunk in iter(lambda: stream.read1(limit), b""):
+        tail = (tail + chunk)[-limit:]
+    return tail
 
 
 class TrickPlayGenerator:
@@ -25,7 +215,9 @@ class TrickPlayGenerator:
         media_key: str,
         bucket: str,
         media_path: str,
-    ) -> Tuple[List[str], List[str]]:
+        job_id: Optional[str] = None,
+        force: bool = False,
+    ) -> Tuple[List[str], List[str], float]:
         """
         Generate trick play thumbnails from HLS stream.
 
@@ -34,9 +226,13 @@ class TrickPlayGenerator:
             media_key: Unique identifier for media
             bucket: S3 bucket name
             media_path: Path in S3 for media (e.g., "content/video123/")
+            job_id: MediaConvert job that produced the HLS output; thumbnails from
+                another job are regenerated
+            force: Regenerate even if a completed run already exists in S3
 
         Returns:
-            Tuple of (small_thumbnails, big_thumbnails) - lists of S3 keys
+            Tuple of (small_thumbnails, big_thumbnails, duration) - lists of S3 keys
+            and media duration in seconds
         """
         with tempfile.TemporaryDirectory() as tmpdir:
             try:
@@ -47,36 +243,47 @@ class TrickPlayGenerator:
                     media_path=media_path,
                 )
 
-                # Download HLS manifest
+                # Retried events reuse the output of a completed run for the same job and layout
+                marker_key = self._completion_marker_key(media_key, media_path)
+                if not force:
+                    existing = self._completed_run(bucket, marker_key, job_id)
+                    if existing:
+                        StructuredLogger.info(
+                            "Thumbnails already exist, skipping generation",
+                            media_key=media_key,
+                            small_count=len(existing["small_thumbnails"]),
+                            big_count=len(existing["big_thumbnails"]),
+                        )
+                        return existing["small_thumbnails"], existing["big_thumbnails"], existing["duration"]
+
+                # Download HLS manifest and its segments so FFmpeg reads them locally
+                manifest_key = hls_url.replace("s3://", "").split("/", 1)[1]
                 manifest_path = os.path.join(tmpdir, "manifest.m3u8")
-                self.s3.download_file(bucket, hls_url.replace("s3://", "").split("/", 1)[1], manifest_path)
+                self.s3.download_file(bucket, manifest_key, manifest_path)
+                local_playlist, duration = self._prefetch_segments(bucket, manifest_key, manifest_path, tmpdir)
 
-                # Generate small thumbnails (320x180)
-                small_dir = os.path.join(tmpdir, "small")
-                os.makedirs(small_dir, exist_ok=True)
-                small_thumbnails = self._generate_resolution_thumbnails(
-                    hls_url,
+                # Generate small (320x180) and big (640x360) thumbnails in one pass
+                small_thumbnails, big_thumbnails = self._generate_all_thumbnails(
+                    local_playlist,
                     media_key,
-                    small_dir,
                     bucket,
                     media_path,
-                    width=self.config.THUMBNAIL_WIDTH,
-                    height=self.config.THUMBNAIL_HEIGHT,
-                    suffix=self.config.THUMBNAIL_SMALL_SUFFIX,
                 )
 
-                # Generate big thumbnails (640x360)
-                big_dir = os.path.join(tmpdir, "big")
-                os.makedirs(big_dir, exist_ok=True)
-                big_thumbnails = self._generate_resolution_thumbnails(
-                    hls_url,
-                    media_key,
-                    big_dir,
-                    bucket,
-                    media_path,
-                    width=self.config.THUMBNAIL_BIG_WIDTH,
-                    height=self.config.THUMBNAIL_BIG_HEIGHT,
-                    suffix=self.config.THUMBNAIL_BIG_SUFFIX,
+                # Written only once every upload has succeeded, so partial runs are redone
+                self.s3.put_object(
+                    bucket=bucket,
+                    key=marker_key,
+                    body=dumps(
+                        {
+                            "job_id": job_id,
+                            "layout": self._layout(),
+                            "duration": duration,
+                            "small_thumbnails": small_thumbnails,
+                            "big_thumbnails": big_thumbnails,
+                        }
+                    ),
+                    content_type="application/json",
                 )
 
                 StructuredLogger.info(
@@ -84,9 +291,10 @@ class TrickPlayGenerator:
                     media_key=media_key,
                     small_count=len(small_thumbnails),
                     big_count=len(big_thumbnails),
+                    duration=duration,
                 )
 
-                return small_thumbnails, big_thumbnails
+                return small_thumbnails, big_thumbnails, duration
 
             except Exception as e:
                 StructuredLogger.error(
@@ -96,79 +304,172 @@ class TrickPlayGenerator:
                 )
                 raise FFMpegError(f"Failed to generate thumbnails for {media_key}: {str(e)}") from e
 
-    def _generate_resolution_thumbnails(
+    def _completion_marker_key(self, media_key: str, media_path: str) -> str:
+        """S3 key of the object recording a completed thumbnail run."""
+        return f"{media_path}{self.config.THUMBNAILS_FOLDER}/{media_key}.complete.json"
+
+    def _layout(self) -> Dict[str, object]:
+        """Settings that determine the generated images; a change invalidates earlier runs."""
+        return {
+            "format": self.config.THUMBNAIL_FORMAT,
+            "interval": self.config.THUMBNAIL_INTERVAL,
+            "small_resolution": self.config.THUMBNAIL_SMALL_RESOLUTION,
+            "small_grid": self.config.THUMBNAIL_TILE_GRID,
+            "big_resolution": self.config.THUMBNAIL_BIG_RESOLUTION,
+            "big_grid": self.config.THUMBNAIL_BIG_TILE_GRID,
+        }
+
+    def _completed_run(self, bucket: str, marker_key: str, job_id: Optional[str]) -> Optional[Dict]:
+        """
+        Load the completion marker if it matches the current layout and job.
+
+        Returns None when there is no marker, e.g. after a run that failed or
+        timed out partway through uploading, so the thumbnails are regenerated.
+        """
+        try:
+            body = self.s3.get_object_if_exists(bucket, marker_key)
+            if body is None:
+                return None
+            marker = loads(body)
+        except (S3Error, ValueError) as e:
+            StructuredLogger.warning(
+                "Unreadable completion marker, regenerating",
+                marker_key=marker_key,
+                exception=str(e),
+            )
+            return None
+
+        if marker.get("layout") != self._layout():
+            return None
+        if job_id and marker.get("job_id") != job_id:
+            return None
+        return marker
+
+    def _generate_all_thumbnails(
         self,
-        hls_url: str,
+        input_path: str,
         media_key: str,
-        output_dir: str,
         bucket: str,
         media_path: str,
-        width: int,
-        height: int,
-        suffix: str,
-    ) -> List[str]:
+    ) -> Tuple[List[str], List[str]]:
         """
-        Generate thumbnails at specific resolution.
+        Generate small and big thumbnails in a single FFmpeg pass.
 
-        Uses FFmpeg filter to extract frames at intervals.
+        The input is decoded once; frames sampled by the fps filter are split,
+        scaled to each resolution and tiled into sprite images with
+        -filter_complex. Each resolution is written to its own pipe and images
+        are uploaded to S3 as they arrive, overlapping decoding with uploads.
         """
+        small_resolution = f"{self.config.THUMBNAIL_WIDTH}x{self.config.THUMBNAIL_HEIGHT}"
+        big_resolution = f"{self.config.THUMBNAIL_BIG_WIDTH}x{self.config.THUMBNAIL_BIG_HEIGHT}"
+
         try:
-            # FFmpeg filter: extract one frame every THUMBNAIL_INTERVAL seconds
-            # select filter: if(not(floor(mod(t,10)))*lt(ld(1),1),st(1,1)+st(2,n)+st(3,t));...
-            # This is optimized for picking frames at regular intervals
-            ffmpeg_filter = (
-                f"select='if(not(floor(mod(t,{self.config.THUMBNAIL_INTERVAL})))*lt(ld(1),1),"
-                f"st(1,1)+st(2,n)+st(3,t));if(eq(ld(1),1)*lt(n,ld(2)+1),1,if(trunc(t-ld(3)),st(1,0)))'"
+            fmt = self.config.THUMBNAIL_FORMAT
+            if fmt not in _PIPE_FORMATS:
+                raise FFMpegError(f"Unsupported thumbnail format: {fmt}")
+            codec, _, _ = _PIPE_FORMATS[fmt]
+
+            # Encoder options for each output; JPEG quality trades size for fidelity
+            output_options = ["-f", "image2pipe", "-c:v", codec]
+            if codec == "mjpeg":
+                output_options += ["-q:v", str(self.config.THUMBNAIL_JPEG_QUALITY)]
+
+            # FFmpeg filter: extract one frame every THUMBNAIL_INTERVAL seconds with the
+            # native fps filter, then split, scale and tile into per-resolution sprites
+            small_tile = _tile_filter(self.config.THUMBNAIL_TILE_GRID)
+            big_tile = _tile_filter(self.config.THUMBNAIL_BIG_TILE_GRID)
+            filter_complex = (
+                f"[0:v]fps=1/{self.config.THUMBNAIL_INTERVAL},split=2[s][b];"
+                f"[s]scale={self.config.THUMBNAIL_WIDTH}:{self.config.THUMBNAIL_HEIGHT}{small_tile}[small];"
+                f"[b]scale={self.config.THUMBNAIL_BIG_WIDTH}:{self.config.THUMBNAIL_BIG_HEIGHT}{big_tile}[big]"
             )
 
-            output_pattern = os.path.join(output_dir, f"{media_key}{suffix}.%05d.{self.config.THUMBNAIL_FORMAT}")
+            # Decode only keyframes when every sample point lands on one
+            keyframes_only = self._keyframes_align(input_path)
+            decode_options = ["-skip_frame", "nokey"] if keyframes_only else []
+
+            # Small frames go to stdout, big frames to an extra pipe
+            big_read_fd, big_write_fd = os.pipe()
 
             # FFmpeg command
             cmd = [
                 "ffmpeg",
+                "-hide_banner",
+                "-nostats",
+                "-loglevel",
+                "error",
+                *HLS_INPUT_OPTIONS,
+                *decode_options,
                 "-i",
-                hls_url,
-                "-vf",
-                ffmpeg_filter,
+                input_path,
+                "-filter_complex",
+                filter_complex,
                 "-vsync",
-                "0",
-                "-s",
-                f"{width}x{height}",
-                output_pattern,
+                "vfr",
+                "-map",
+                "[small]",
+                *output_options,
+                "pipe:1",
+                "-map",
+                "[big]",
+                *output_options,
+                f"pipe:{big_write_fd}",
             ]
 
             StructuredLogger.info(
                 "Running FFmpeg",
                 media_key=media_key,
-                resolution=f"{width}x{height}",
-                suffix=suffix,
+                resolutions=[small_resolution, big_resolution],
+                keyframes_only=keyframes_only,
             )
 
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-
-            if process.returncode != 0:
-                error_msg = stderr.decode("utf-8") if stderr else "Unknown FFmpeg error"
-                raise FFMpegError(f"FFmpeg failed for {media_key}: {error_msg}")
+            try:
+                process = subprocess.Popen(
+                    cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=(big_write_fd,)
+                )
+            except Exception:
+                os.close(big_read_fd)
+                raise
+            finally:
+                os.close(big_write_fd)
 
-            # Upload generated thumbnails to S3
-            thumbnail_keys = []
             thumbnails_folder = f"{media_path}{self.config.THUMBNAILS_FOLDER}/"
 
-            for filename in sorted(os.listdir(output_dir)):
-                if filename.endswith(f".{self.config.THUMBNAIL_FORMAT}"):
-                    file_path = os.path.join(output_dir, filename)
-                    s3_key = f"{thumbnails_folder}{filename}"
-
-                    self.s3.upload_file(
+            with open(big_read_fd, "rb") as big_stream, ThreadPoolExecutor(
+                max_workers=UPLOAD_WORKERS
+            ) as uploader, ThreadPoolExecutor(max_workers=3) as readers:
+                try:
+                    # Producers: split each pipe into frames and queue uploads on the pool
+                    small_reader = readers.submit(
+                        self._upload_frames,
+                        process.stdout,
+                        uploader,
                         bucket,
-                        s3_key,
-                        file_path,
-                        content_type=f"image/{self.config.THUMBNAIL_FORMAT}",
-                        public=True,
+                        f"{thumbnails_folder}{media_key}{self.config.THUMBNAIL_SMALL_SUFFIX}",
                     )
+                    big_reader = readers.submit(
+                        self._upload_frames,
+                        big_stream,
+                        uploader,
+                        bucket,
+                        f"{thumbnails_folder}{media_key}{self.config.THUMBNAIL_BIG_SUFFIX}",
+                    )
+                    stderr_reader = readers.submit(_read_tail, process.stderr)
+
+                    small_uploads = small_reader.result()
+                    big_uploads = big_reader.result()
+                    stderr = stderr_reader.result()
+                    process.wait()
+                except BaseException:
+                    process.kill()
+                    raise
+
+                if process.returncode != 0:
+                    error_msg = stderr.decode("utf-8", errors="replace") if stderr else "Unknown FFmpeg error"
+                    raise FFMpegError(f"FFmpeg failed for {media_key}: {error_msg}")
 
-                    thumbnail_keys.append(s3_key)
+                for s3_key, future in small_uploads + big_uploads:
+                    future.result()
 
                     StructuredLogger.debug(
                         "Thumbnail uploaded",
@@ -176,20 +477,187 @@ class TrickPlayGenerator:
                         s3_key=s3_key,
                     )
 
+            small_keys = [s3_key for s3_key, _ in small_uploads]
+            big_keys = [s3_key for s3_key, _ in big_uploads]
+
             StructuredLogger.info(
-                "Resolution thumbnails generated and uploaded",
+                "Thumbnails generated and uploaded",
                 media_key=media_key,
-                resolution=f"{width}x{height}",
-                count=len(thumbnail_keys),
+                small_count=len(small_keys),
+                big_count=len(big_keys),
             )
 
-            return thumbnail_keys
+            return small_keys, big_keys
 
         except Exception as e:
             StructuredLogger.error(
-                "Resolution thumbnail generation failed",
+                "Thumbnail generation failed",
                 media_key=media_key,
-                resolution=f"{width}x{height}",
+                resolutions=[small_resolution, big_resolution],
                 exception=e,
             )
             raise
+
+    def _upload_frames(
+        self,
+        stream: BinaryIO,
+        uploader: ThreadPoolExecutor,
+        bucket: str,
+        key_prefix: str,
+    ) -> List[Tuple[str, Future]]:
+        """
+        Split FFmpeg image2pipe output into frames and submit an upload per frame.
+
+        Frames are numbered from 1 in arrival order, matching FFmpeg's %05d
+        image sequence naming.
+
+        Returns:
+            List of (s3_key, upload_future) in frame order
+        """
+        fmt = self.config.THUMBNAIL_FORMAT
+        _, end_marker, content_type = _PIPE_FORMATS[fmt]
+
+        # Bind per-frame lookups to locals outside the loop
+        submit = uploader.submit
+        upload_bytes = self.s3.upload_bytes
+
+        uploads = []
+        append = uploads.append
+        for number, frame in enumerate(_iter_frames(stream, end_marker), start=1):
+            s3_key = f"{key_prefix}.{number:05d}.{fmt}"
+            append((s3_key, submit(upload_bytes, bucket, s3_key, frame, content_type=content_type, public=True)))
+
+        return uploads
+
+    def _keyframes_align(self, input_path: str) -> bool:
+        """
+        Check whether source keyframes fall on every thumbnail sample point.
+
+        Probes keyframe timestamps at the start of the input with ffprobe. If
+        a keyframe lands on every sample point (typical for MediaConvert HLS
+        output with a fixed GOP that divides THUMBNAIL_INTERVAL), sampling
+        keyframes only yields the same thumbnails without decoding the frames
+        in between.
+        """
+        interval = self.config.THUMBNAIL_INTERVAL
+        cmd = [
+            "ffprobe",
+            "-v",
+            "error",
+            *HLS_INPUT_OPTIONS,
+            "-select_streams",
+            "v:0",
+            "-skip_frame",
+            "nokey",
+            "-show_entries",
+            "frame=pts_time",
+            "-of",
+            "csv=p=0",
+            "-read_intervals",
+            f"%+{interval * KEYFRAME_PROBE_INTERVALS}",
+            input_path,
+        ]
+
+        try:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                check=True,
+                timeout=KEYFRAME_PROBE_TIMEOUT,
+            )
+            times = [float(line) for line in result.stdout.decode("utf-8").split() if line]
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            StructuredLogger.warning("Keyframe probe failed, decoding all frames", exception=str(e))
+            return False
+
+        return _keyframes_cover_samples(times, interval)
+
+    def _prefetch_segments(
+        self, bucket: str, manifest_key: str, manifest_path: str, tmpdir: str
+    ) -> Tuple[str, float]:
+        """
+        Download HLS media segments in parallel and write a local playlist.
+
+        For a master playlist, only the variant chosen by _select_variant is
+        fetched. Relative URIs (segment lines and URI="..." attributes such as
+        #EXT-X-MAP) are downloaded into tmpdir and rewritten to local paths, so
+        FFmpeg reads everything from disk instead of fetching segments serially.
+        Their size comes from #EXT-X-BYTERANGE or the variant's BANDWIDTH, else
+        from listing them in S3. When they may not fit in free /tmp space (or
+        the size is unknown), URIs are rewritten to pre-signed S3 URLs instead
+        and FFmpeg streams them.
+
+        Returns:
+            Tuple of (path to the local media playlist, media duration in seconds)
+        """
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        playlist_key = manifest_key
+        bandwidth = 0
+
+        if "#EXT-X-STREAM-INF" in content:
+            variant_uri, bandwidth = _select_variant(content, self.config.THUMBNAIL_BIG_HEIGHT)
+            playlist_key = _resolve_key(posixpath.dirname(manifest_key), variant_uri)
+            variant_path = os.path.join(tmpdir, "variant.m3u8")
+            self.s3.download_file(bucket, playlist_key, variant_path)
+            with open(variant_path, "r", encoding="utf-8") as f:
+                content = f.read()
+
+        base_dir = posixpath.dirname(playlist_key)
+        segment_dir = os.path.join(tmpdir, "segments")
+        downloads: Dict[str, str] = {}
+
+        def localize(uri: str) -> str:
+            key = _resolve_key(base_dir, uri)
+            if key not in downloads:
+                downloads[key] = os.path.join(segment_dir, f"{len(downloads):05d}{posixpath.splitext(key)[1]}")
+            return downloads[key]
+
+        local_content = _rewrite_uris(content, localize)
+
+        duration = _playlist_duration(content)
+        media_bytes = _estimate_media_bytes(content, bandwidth, duration)
+        if media_bytes is None:
+            media_bytes = self._listed_size(bucket, list(downloads))
+        free_bytes = shutil.disk_usage(tmpdir).free
+
+        if media_bytes is None or media_bytes > free_bytes * SEGMENT_DISK_FRACTION:
+            StructuredLogger.warning(
+                "HLS segments may not fit in ephemeral storage, streaming from S3",
+                playlist_key=playlist_key,
+                estimated_bytes=media_bytes,
+                free_bytes=free_bytes,
+            )
+            local_content = _rewrite_uris(
+                content, lambda uri: self.s3.generate_presigned_url(bucket, _resolve_key(base_dir, uri))
+            )
+        else:
+            os.makedirs(segment_dir, exist_ok=True)
+
+            StructuredLogger.info("Prefetching HLS segments", playlist_key=playlist_key, count=len(downloads))
+
+            with ThreadPoolExecutor(max_workers=SEGMENT_DOWNLOAD_WORKERS) as executor:
+                list(executor.map(lambda item: self.s3.download_file(bucket, *item), downloads.items()))
+
+        local_playlist = os.path.join(tmpdir, "local.m3u8")
+        with open(local_playlist, "w", encoding="utf-8") as f:
+            f.write(local_content)
+
+        return local_playlist, duration
+
+    def _listed_size(self, bucket: str, keys: List[str]) -> Optional[int]:
+        """
+        Total size of S3 objects from one listing of their common prefix.
+
+        Returns None when the keys share no prefix or any of them is missing.
+        """
+        prefix = os.path.commonprefix(keys)
+        if not prefix:
+            return None
+
+        wanted = set(keys)
+        sizes = {key: size for key, size in self.s3.list_object_sizes(bucket, prefix) if key in wanted}
+        if len(sizes) != len(wanted):
+            return None
+        return sum(sizes.values())
@@ -1,13 +1,19 @@
 """Lambda handler for trick play thumbnail generation."""
 
-import json
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from generator import TrickPlayGenerator
 from shared.aws_helpers import SQSHelper
 from shared.config import Config
 from shared.errors import FFMpegError, TrickPlayError
 from shared.logger import StructuredLogger
+from shared.serialization import dumps
+
+_generator = TrickPlayGenerator(region_name=Config.AWS_REGION)
+_sqs = SQSHelper(region_name=Config.AWS_REGION)
+
+# Constant response body for unexpected errors
+_ERR_500 = dumps({"error": "Internal server error"})
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -18,6 +24,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     {
         "detail": {
             "eventType": "JOB_COMPLETE",
+            "jobId": "1700000000000-abc123",
             "mediaKeyId": "content/video123/",
             "mediaKey": "unique-video-id",
             "outputGroupDetails": [
@@ -28,9 +35,13 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         }
                     ]
                 }
-            ]
+            ],
+            "force": false
         }
     }
+
+    Thumbnails from a completed run for the same jobId are reused; a new job
+    (re-encode) regenerates them, as does "force": true.
     """
     try:
         StructuredLogger.info("Trick play generator lambda invoked", request_id=context.request_id)
@@ -38,10 +49,16 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Validate configuration
         Config.validate()
 
+        bucket = Config.AWS_S3_BUCKET
+        man_q = Config.SQS_MANIFEST_QUEUE_URL
+
         # Parse event
         detail = event.get("detail", {})
         media_key = detail.get("mediaKey")
         media_path = detail.get("mediaKeyId")
+        job_id = detail.get("jobId")
+        # Only a JSON true forces; strings such as "false" must not
+        force = detail.get("force") is True
 
         if not media_key or not media_path:
             raise ValueError("Missing required fields: mediaKey, mediaKeyId")
@@ -59,27 +76,28 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
 
         # Generate thumbnails
-        generator = TrickPlayGenerator(region_name=Config.AWS_REGION)
-        small_thumbs, big_thumbs = generator.generate_thumbnails(
+        small_thumbs, big_thumbs, duration = _generator.generate_thumbnails(
             hls_url=hls_url,
             media_key=media_key,
-            bucket=Config.AWS_S3_BUCKET,
+            bucket=bucket,
             media_path=media_path,
+            job_id=job_id,
+            force=force,
         )
 
         # Publish to SQS for manifest update
-        sqs = SQSHelper(region_name=Config.AWS_REGION)
         manifest_message = {
             "media_key": media_key,
             "media_path": media_path,
             "hls_url": hls_url,
             "small_thumbnails": small_thumbs,
             "big_thumbnails": big_thumbs,
+            "duration": duration,
             "request_id": context.request_id,
         }
 
-        if Config.SQS_MANIFEST_QUEUE_URL:
-            sqs.send_message(Config.SQS_MANIFEST_QUEUE_URL, manifest_message)
+        if man_q:
+            _sqs.send_message(man_q, manifest_message)
 
         StructuredLogger.info(
             "Trick play generation succeeded",
@@ -89,7 +107,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
         return {
             "statusCode": 200,
-            "body": json.dumps({
+            "body": dumps({
                 "message": "Trick play thumbnails generated successfully",
                 "media_key": media_key,
                 "small_thumbnails_count": len(small_thumbs),
@@ -105,7 +123,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         return {
             "statusCode": 400,
-            "body": json.dumps({"error": str(e)}),
+            "body": dumps({"error": str(e)}),
         }
     except Exception as e:
         StructuredLogger.error(
@@ -115,22 +133,23 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         return {
             "statusCode": 500,
-            "body": json.dumps({"error": "Internal server error"}),
+            "body": _ERR_500,
         }
 
 
-def _extract_hls_url(detail: Dict[str, Any]) -> str:
+def _extract_hls_url(detail: Dict[str, Any]) -> Optional[str]:
     """Extract HLS manifest URL from MediaConvert event."""
     try:
-        output_groups = detail.get("outputGroupDetails", [])
-        for output_group in output_groups:
-            outputs = output_group.get("outputDetails", [])
-            for output in outputs:
-                paths = output.get("outputFilePaths", [])
-                for path in paths:
-                    if "m3u8" in path:
-                        return path
-        return None
+        return next(
+            (
+                path
+                for output_group in detail.get("outputGroupDetails", ())
+                for output in output_group.get("outputDetails", ())
+                for path in output.get("outputFilePaths", ())
+                if "m3u8" in path
+            ),
+            None,
+        )
     except Exception as e:
         StructuredLogger.error("Error extracting HLS URL from event", exception=e)
         return None
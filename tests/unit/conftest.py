@@ -0,0 +1,29 @@
+"""Mirror the Lambda package layout: shared/ and each function's modules are top-level imports."""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FUNCTIONS = ("trick_play_generator", "manifest_updater", "cache_invalidator")
+
+sys.path[:0] = [ROOT] + [os.path.join(ROOT, "src", function) for function in FUNCTIONS]
+
+
+@pytest.fixture(scope="session")
+def load_handler():
+    """Import a function's handler.py as handler_<function> (every function names it handler)."""
+    cache = {}
+
+    def load(function_name: str):
+        if function_name not in cache:
+            path = os.path.join(ROOT, "src", function_name, "handler.py")
+            spec = importlib.util.spec_from_file_location(f"handler_{function_name}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            cache[function_name] = module
+        return cache[function_name]
+
+    return load
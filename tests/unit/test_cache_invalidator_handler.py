@@ -0,0 +1,77 @@
+"""Unit tests for cache invalidator batching and per-record fallback."""
+
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from shared.config import Config
+from shared.errors import CDNInvalidationError
+from shared.serialization import dumps
+
+
+@pytest.fixture
+def handler(load_handler, monkeypatch):
+    module = load_handler("cache_invalidator")
+    monkeypatch.setattr(Config, "_validated", True)
+    monkeypatch.setattr(Config, "AWS_CLOUDFRONT_DISTRIBUTION_ID", "E123")
+    monkeypatch.setattr(module, "_invalidator", mock.Mock())
+    return module
+
+
+def sqs_record(i, paths):
+    return {"messageId": f"m{i}", "body": dumps({"media_key": f"video{i}", "paths_to_invalidate": paths})}
+
+
+def invoke(handler, records):
+    return handler.lambda_handler({"Records": records}, SimpleNamespace(request_id="req"))
+
+
+def invalidated_paths(handler):
+    return [call.kwargs["paths"] for call in handler._invalidator.invalidate_cache.call_args_list]
+
+
+def test_batch_is_one_deduplicated_invalidation(handler):
+    response = invoke(handler, [sqs_record(0, ["/a", "/shared"]), sqs_record(1, ["/b", "/shared"])])
+
+    assert response["batchItemFailures"] == []
+    assert invalidated_paths(handler) == [["/a", "/shared", "/b"]]
+
+
+def test_batch_is_chunked_at_path_limit(handler, monkeypatch):
+    monkeypatch.setattr(handler, "MAX_INVALIDATION_PATHS", 2)
+
+    invoke(handler, [sqs_record(0, ["/a", "/b", "/c"])])
+
+    assert invalidated_paths(handler) == [["/a", "/b"], ["/c"]]
+
+
+def test_failed_batch_falls_back_to_per_record(handler):
+    def invalidate(paths, distribution_id):
+        if "/bad" in paths:
+            raise CDNInvalidationError("InvalidArgument")
+        return "I1"
+
+    handler._invalidator.invalidate_cache.side_effect = invalidate
+
+    response = invoke(handler, [sqs_record(0, ["/a"]), sqs_record(1, ["/bad"]), sqs_record(2, ["/c"])])
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "m1"}]
+    assert invalidated_paths(handler) == [["/a", "/bad", "/c"], ["/a"], ["/bad"], ["/c"]]
+
+
+def test_throttled_batch_redelivers_every_record(handler):
+    handler._invalidator.invalidate_cache.side_effect = CDNInvalidationError("Throttling")
+
+    response = invoke(handler, [sqs_record(0, ["/a"]), sqs_record(1, ["/b"])])
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "m0"}, {"itemIdentifier": "m1"}]
+
+
+def test_malformed_record_is_dropped(handler):
+    records = [{"messageId": "m0", "body": "not json"}, sqs_record(1, ["/b"])]
+
+    response = invoke(handler, records)
+
+    assert response["batchItemFailures"] == []
+    assert invalidated_paths(handler) == [["/b"]]
@@ -0,0 +1,358 @@
+"""Unit tests for trick play generator stream and playlist parsing."""
+
+import io
+import shutil
+from collections import namedtuple
+from unittest import mock
+
+import pytest
+
+import generator
+from generator import (
+    TrickPlayGenerator,
+    _estimate_media_bytes,
+    _iter_frames,
+    _keyframes_cover_samples,
+    _resolve_key,
+    _rewrite_uris,
+    _select_variant,
+)
+from shared.errors import FFMpegError
+
+JPEG_END = b"\xff\xd9"
+
+
+class ChunkedStream:
+    """Stream whose read1 returns the given chunks one at a time."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def read1(self, size=-1):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+def test_iter_frames_splits_concatenated_images():
+    data = b"\xff\xd8one\xff\xd9\xff\xd8two\xff\xd9"
+
+    assert list(_iter_frames(io.BytesIO(data), JPEG_END)) == [b"\xff\xd8one\xff\xd9", b"\xff\xd8two\xff\xd9"]
+
+
+def test_iter_frames_handles_marker_split_across_reads():
+    stream = ChunkedStream([b"\xff\xd8one\xff", b"\xd9\xff\xd8two", b"\xff\xd9"])
+
+    assert list(_iter_frames(stream, JPEG_END)) == [b"\xff\xd8one\xff\xd9", b"\xff\xd8two\xff\xd9"]
+
+
+def test_iter_frames_handles_small_reads():
+    data = b"\xff\xd8one\xff\xd9\xff\xd8two\xff\xd9"
+
+    assert list(_iter_frames(io.BytesIO(data), JPEG_END, chunk_size=1)) == [
+        b"\xff\xd8one\xff\xd9",
+        b"\xff\xd8two\xff\xd9",
+    ]
+
+
+def test_iter_frames_drops_trailing_partial_frame():
+    data = b"\xff\xd8one\xff\xd9\xff\xd8tru"
+
+    assert list(_iter_frames(io.BytesIO(data), JPEG_END)) == [b"\xff\xd8one\xff\xd9"]
+
+
+def test_iter_frames_png_marker():
+    png_end = b"IEND\xaeB`\x82"
+    stream = ChunkedStream([b"\x89PNGaIEND\xae", b"B`\x82\x89PNGbIE", b"ND\xaeB`\x82"])
+
+    assert list(_iter_frames(stream, png_end)) == [b"\x89PNGaIEND\xaeB`\x82", b"\x89PNGbIEND\xaeB`\x82"]
+
+
+def test_iter_frames_empty_stream():
+    assert list(_iter_frames(io.BytesIO(b""), JPEG_END)) == []
+
+
+def keyframe_times(start, gap, count):
+    return [round(start + i * gap, 6) for i in range(count)]
+
+
+def test_keyframes_cover_samples_with_fixed_gop():
+    assert _keyframes_cover_samples(keyframe_times(0.0, 2.0, 31), 10)
+
+
+def test_keyframes_cover_samples_measured_from_first_keyframe():
+    # MPEG-TS output typically starts at a non-zero PTS
+    assert _keyframes_cover_samples(keyframe_times(1.4, 2.0, 31), 10)
+
+
+def test_keyframes_cover_samples_rejects_drifting_ntsc_gop():
+    # 60-frame GOP at 29.97 fps drifts 10 ms off the grid per sample
+    assert not _keyframes_cover_samples(keyframe_times(1.4, 2.002, 30), 10)
+
+
+def test_keyframes_cover_samples_rejects_gap_not_dividing_interval():
+    assert not _keyframes_cover_samples(keyframe_times(0.0, 3.0, 21), 10)
+
+
+def test_keyframes_cover_samples_rejects_gap_longer_than_interval():
+    assert not _keyframes_cover_samples(keyframe_times(0.0, 20.0, 4), 10)
+
+
+def test_keyframes_cover_samples_needs_two_keyframes():
+    assert not _keyframes_cover_samples([], 10)
+    assert not _keyframes_cover_samples([1.4], 10)
+
+
+MASTER = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080
+play_1080p.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360
+play_360p.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=400000,RESOLUTION=416x234
+play_234p.m3u8
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-TARGETDURATION:6
+#EXT-X-MAP:URI="../init/init.mp4"
+#EXTINF:6.000,
+../segments/seg_00001.ts
+#EXTINF:4.500,
+seg_00002.ts
+#EXTINF:6.000,
+https://cdn.example.com/seg_00003.ts
+#EXT-X-ENDLIST
+"""
+
+
+def test_select_variant_lowest_bandwidth_tall_enough():
+    assert _select_variant(MASTER, 360) == ("play_360p.m3u8", 800000)
+
+
+def test_select_variant_without_resolution_uses_highest_bandwidth():
+    master = "#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=800000\nlow.m3u8\n#EXT-X-STREAM-INF:BANDWIDTH=2000000\nhigh.m3u8\n"
+
+    assert _select_variant(master, 360) == ("high.m3u8", 2000000)
+
+
+def test_select_variant_skips_average_bandwidth():
+    master = "#EXTM3U\n#EXT-X-STREAM-INF:AVERAGE-BANDWIDTH=1,BANDWIDTH=900000,RESOLUTION=640x360\nv.m3u8\n"
+
+    assert _select_variant(master, 360) == ("v.m3u8", 900000)
+
+
+def test_select_variant_without_variants():
+    with pytest.raises(FFMpegError):
+        _select_variant("#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=1\n", 360)
+
+
+def test_rewrite_uris_resolves_relative_and_map_uris():
+    base_dir = "content/video123/hls"
+
+    rewritten = _rewrite_uris(MEDIA, lambda uri: f"/tmp/{_resolve_key(base_dir, uri)}")
+
+    assert '#EXT-X-MAP:URI="/tmp/content/video123/init/init.mp4"' in rewritten
+    assert "/tmp/content/video123/segments/seg_00001.ts" in rewritten.splitlines()
+    assert "/tmp/content/video123/hls/seg_00002.ts" in rewritten.splitlines()
+    assert "https://cdn.example.com/seg_00003.ts" in rewritten.splitlines()
+    assert "#EXTINF:4.500," in rewritten.splitlines()
+
+
+def test_estimate_media_bytes_from_byterange():
+    content = "#EXTINF:6.0,\n#EXT-X-BYTERANGE:1000@0\nall.ts\n#EXTINF:6.0,\n#EXT-X-BYTERANGE:2500\nall.ts\n"
+
+    assert _estimate_media_bytes(content, 800000, 12.0) == 3500
+
+
+def test_estimate_media_bytes_from_bandwidth():
+    assert _estimate_media_bytes(MEDIA, 800000, 16.5) == 1650000
+    assert _estimate_media_bytes(MEDIA, 0, 16.5) is None
+
+
+DiskUsage = namedtuple("DiskUsage", "total used free")
+
+
+@pytest.fixture
+def trick_play_generator():
+    instance = TrickPlayGenerator.__new__(TrickPlayGenerator)
+    instance.config = generator.Config
+    instance.s3 = mock.Mock()
+    instance.s3.generate_presigned_url.side_effect = lambda bucket, key: f"https://s3/{bucket}/{key}?sig"
+    return instance
+
+
+def _write_manifests(tmp_path):
+    """Fake S3 downloads: master at content/v/play.m3u8, media playlist under hls/."""
+    objects = {"content/v/play.m3u8": MASTER, "content/v/play_360p.m3u8": MEDIA}
+
+    def download_file(bucket, key, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(objects.get(key, "segment"))
+
+    manifest_path = tmp_path / "manifest.m3u8"
+    download_file("b", "content/v/play.m3u8", manifest_path)
+    return str(manifest_path), download_file
+
+
+def test_prefetch_segments_downloads_variant(trick_play_generator, tmp_path, monkeypatch):
+    manifest_path, download_file = _write_manifests(tmp_path)
+    trick_play_generator.s3.download_file.side_effect = download_file
+    monkeypatch.setattr(shutil, "disk_usage", lambda path: DiskUsage(0, 0, 10**9))
+
+    playlist, duration = trick_play_generator._prefetch_segments(
+        "b", "content/v/play.m3u8", manifest_path, str(tmp_path)
+    )
+
+    downloaded = [call.args[1] for call in trick_play_generator.s3.download_file.call_args_list]
+    assert duration == 16.5
+    assert sorted(downloaded) == [
+        "content/init/init.mp4",
+        "content/segments/seg_00001.ts",
+        "content/v/play_360p.m3u8",
+        "content/v/seg_00002.ts",
+    ]
+    segment_dir = tmp_path / "segments"
+    with open(playlist, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert f'#EXT-X-MAP:URI="{segment_dir / "00000.mp4"}"' in lines
+    assert [line for line in lines if line and not line.startswith("#")] == [
+        str(segment_dir / "00001.ts"),
+        str(segment_dir / "00002.ts"),
+        "https://cdn.example.com/seg_00003.ts",
+    ]
+    trick_play_generator.s3.generate_presigned_url.assert_not_called()
+
+
+def test_prefetch_segments_streams_when_disk_is_short(trick_play_generator, tmp_path, monkeypatch):
+    manifest_path, download_file = _write_manifests(tmp_path)
+    trick_play_generator.s3.download_file.side_effect = download_file
+    monkeypatch.setattr(shutil, "disk_usage", lambda path: DiskUsage(0, 0, 1000))
+
+    playlist, _ = trick_play_generator._prefetch_segments("b", "content/v/play.m3u8", manifest_path, str(tmp_path))
+
+    downloaded = [call.args[1] for call in trick_play_generator.s3.download_file.call_args_list]
+    assert downloaded == ["content/v/play_360p.m3u8"]
+    with open(playlist, encoding="utf-8") as f:
+        content = f.read()
+    assert '#EXT-X-MAP:URI="https://s3/b/content/init/init.mp4?sig"' in content
+    assert "https://s3/b/content/v/seg_00002.ts?sig" in content.splitlines()
+
+
+MEDIA_ONLY = """#EXTM3U
+#EXT-X-KEY:METHOD=AES-128,URI="keys/content.key"
+#EXTINF:6.000,
+seg_00001.ts
+#EXTINF:6.000,
+seg_00002.ts
+#EXT-X-ENDLIST
+"""
+
+
+def _listing(sizes):
+    return lambda bucket, prefix: [(key, size) for key, size in sizes.items() if key.startswith(prefix)]
+
+
+def test_prefetch_media_playlist_sized_from_listing(trick_play_generator, tmp_path, monkeypatch):
+    manifest_path = tmp_path / "manifest.m3u8"
+    manifest_path.write_text(MEDIA_ONLY, encoding="utf-8")
+    trick_play_generator.s3.list_object_sizes.side_effect = _listing(
+        {"content/v/keys/content.key": 16, "content/v/seg_00001.ts": 500, "content/v/seg_00002.ts": 500}
+    )
+    monkeypatch.setattr(shutil, "disk_usage", lambda path: DiskUsage(0, 0, 10**6))
+
+    playlist, duration = trick_play_generator._prefetch_segments(
+        "b", "content/v/play.m3u8", str(manifest_path), str(tmp_path)
+    )
+
+    assert duration == 12.0
+    trick_play_generator.s3.list_object_sizes.assert_called_once_with("b", "content/v/")
+    downloaded = sorted(call.args[1] for call in trick_play_generator.s3.download_file.call_args_list)
+    assert downloaded == ["content/v/keys/content.key", "content/v/seg_00001.ts", "content/v/seg_00002.ts"]
+    with open(playlist, encoding="utf-8") as f:
+        assert f'URI="{tmp_path / "segments" / "00000.key"}"' in f.read()
+
+
+def test_prefetch_media_playlist_streams_when_listing_incomplete(trick_play_generator, tmp_path, monkeypatch):
+    manifest_path = tmp_path / "manifest.m3u8"
+    manifest_path.write_text(MEDIA_ONLY, encoding="utf-8")
+    trick_play_generator.s3.list_object_sizes.side_effect = _listing({"content/v/seg_00001.ts": 500})
+    monkeypatch.setattr(shutil, "disk_usage", lambda path: DiskUsage(0, 0, 10**6))
+
+    playlist, _ = trick_play_generator._prefetch_segments("b", "content/v/play.m3u8", str(manifest_path), str(tmp_path))
+
+    trick_play_generator.s3.download_file.assert_not_called()
+    with open(playlist, encoding="utf-8") as f:
+        assert "https://s3/b/content/v/seg_00001.ts?sig" in f.read().splitlines()
+
+
+@pytest.fixture
+def completed_run(trick_play_generator):
+    """Generator whose FFmpeg stages are stubbed, with S3 objects held in a dict."""
+    objects = {}
+    trick_play_generator.s3.get_object_if_exists.side_effect = lambda bucket, key: objects.get(key)
+    trick_play_generator.s3.put_object.side_effect = lambda bucket, key, body, **kwargs: objects.__setitem__(key, body)
+    trick_play_generator._prefetch_segments = mock.Mock(return_value=("local.m3u8", 95.0))
+    trick_play_generator._generate_all_thumbnails = mock.Mock(
+        return_value=(["c/thumbs/k_small.00001.jpg"], ["c/thumbs/k_big.00001.jpg"])
+    )
+    return trick_play_generator, objects
+
+
+def generate(instance, **kwargs):
+    return instance.generate_thumbnails("s3://b/c/play.m3u8", "k", "b", "c/", **kwargs)
+
+
+def test_completed_run_is_reused_for_same_job(completed_run):
+    instance, objects = completed_run
+    first = generate(instance, job_id="job1")
+
+    assert "c/thumbs/k.complete.json" in objects
+    assert generate(instance, job_id="job1") == first == (
+        ["c/thumbs/k_small.00001.jpg"],
+        ["c/thumbs/k_big.00001.jpg"],
+        95.0,
+    )
+    assert instance._generate_all_thumbnails.call_count == 1
+    instance.s3.file_exists.assert_not_called()
+
+
+def test_completed_run_regenerated_for_other_job(completed_run):
+    instance, _ = completed_run
+    generate(instance, job_id="job1")
+    generate(instance, job_id="job2")
+
+    assert instance._generate_all_thumbnails.call_count == 2
+
+
+def test_completed_run_regenerated_when_layout_changes(completed_run, monkeypatch):
+    instance, _ = completed_run
+    generate(instance, job_id="job1")
+    monkeypatch.setattr(generator.Config, "THUMBNAIL_TILE_GRID", 1)
+    generate(instance, job_id="job1")
+
+    assert instance._generate_all_thumbnails.call_count == 2
+
+
+def test_completed_run_regenerated_when_forced(completed_run):
+    instance, _ = completed_run
+    generate(instance, job_id="job1")
+    generate(instance, job_id="job1", force=True)
+
+    assert instance._generate_all_thumbnails.call_count == 2
+
+
+def test_failed_run_writes_no_marker(completed_run):
+    instance, objects = completed_run
+    instance._generate_all_thumbnails.side_effect = FFMpegError("killed")
+
+    with pytest.raises(FFMpegError):
+        generate(instance, job_id="job1")
+
+    assert objects == {}
+
+
+def test_unreadable_marker_regenerates(completed_run):
+    instance, objects = completed_run
+    objects["c/thumbs/k.complete.json"] = "not json"
+
+    generate(instance, job_id="job1")
+
+    assert instance._generate_all_thumbnails.call_count == 1
@@ -0,0 +1,93 @@
+"""Unit tests for manifest updater SQS batch handling."""
+
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from shared.aws_helpers import SQSHelper
+from shared.config import Config
+from shared.serialization import dumps
+
+
+@pytest.fixture
+def handler(load_handler, monkeypatch):
+    module = load_handler("manifest_updater")
+    monkeypatch.setattr(Config, "_validated", True)
+    monkeypatch.setattr(Config, "AWS_S3_BUCKET", "bucket")
+    monkeypatch.setattr(Config, "SQS_MANIFEST_QUEUE_URL", "manifest-queue")
+    monkeypatch.setattr(Config, "SQS_CACHE_INVALIDATION_QUEUE_URL", "invalidation-queue")
+    monkeypatch.setattr(module, "_updater", mock.Mock())
+    monkeypatch.setattr(module, "_sqs", mock.Mock())
+    module._sqs.send_messages.return_value = []
+    return module
+
+
+def sqs_record(i, body=None):
+    message = {"media_key": f"video{i}", "media_path": f"content/video{i}/", "hls_url": "s3://bucket/play.m3u8"}
+    return {"messageId": f"m{i}", "receiptHandle": f"rh{i}", "body": dumps(message) if body is None else body}
+
+
+def invoke(handler, records):
+    return handler.lambda_handler({"Records": records}, SimpleNamespace(request_id="req"))
+
+
+def deleted_handles(handler):
+    return [entry["ReceiptHandle"] for call in handler._sqs.delete_messages.call_args_list for entry in call.args[1]]
+
+
+def test_all_records_succeed(handler):
+    response = invoke(handler, [sqs_record(0), sqs_record(1)])
+
+    assert response["batchItemFailures"] == []
+    assert deleted_handles(handler) == ["rh0", "rh1"]
+    messages = handler._sqs.send_messages.call_args.args[1]
+    assert [message["media_key"] for message in messages] == ["video0", "video1"]
+
+
+def test_rejected_invalidation_messages_are_redelivered(handler):
+    handler._sqs.send_messages.return_value = [1]
+
+    response = invoke(handler, [sqs_record(0), sqs_record(1), sqs_record(2)])
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "m1"}]
+    assert deleted_handles(handler) == ["rh0", "rh2"]
+
+
+def test_failed_send_redelivers_every_processed_record(handler):
+    handler._sqs.send_messages.side_effect = RuntimeError("throttled")
+
+    response = invoke(handler, [sqs_record(0), sqs_record(1)])
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "m0"}, {"itemIdentifier": "m1"}]
+    handler._sqs.delete_messages.assert_not_called()
+
+
+def test_failed_processing_is_redelivered(handler):
+    def update(media_path, **kwargs):
+        if media_path == "content/video1/":
+            raise RuntimeError("S3 down")
+        return {}
+
+    handler._updater.create_manifests_and_update_playlist.side_effect = update
+
+    response = invoke(handler, [sqs_record(0), sqs_record(1), sqs_record(2, body="not json")])
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "m1"}, {"itemIdentifier": "m2"}]
+    assert deleted_handles(handler) == ["rh0"]
+
+
+def test_send_messages_maps_failed_entry_ids_to_indexes():
+    sqs = SQSHelper.__new__(SQSHelper)
+    sqs.client = mock.Mock()
+    sqs.client.send_message_batch.side_effect = [
+        {"Successful": [], "Failed": [{"Id": "3", "Code": "InternalError"}]},
+        {"Successful": [], "Failed": [{"Id": "11", "Code": "InternalError"}]},
+    ]
+
+    failed = sqs.send_messages("queue", [{"n": i} for i in range(12)])
+
+    assert failed == [3, 11]
+    batches = [call.kwargs["Entries"] for call in sqs.client.send_message_batch.call_args_list]
+    assert [entry["Id"] for entry in batches[1]] == ["10", "11"]
+    assert batches[1][1]["MessageBody"] == dumps({"n": 11})
@@ -0,0 +1,51 @@
+"""Unit tests for trick play generator event parsing."""
+
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from shared.config import Config
+
+
+@pytest.fixture
+def handler(load_handler, monkeypatch):
+    module = load_handler("trick_play_generator")
+    monkeypatch.setattr(Config, "_validated", True)
+    monkeypatch.setattr(Config, "SQS_MANIFEST_QUEUE_URL", None)
+    monkeypatch.setattr(module, "_generator", mock.Mock())
+    module._generator.generate_thumbnails.return_value = ([], [], 0.0)
+    return module
+
+
+def invoke(handler, **detail):
+    event = {
+        "detail": {
+            "jobId": "job1",
+            "mediaKey": "k",
+            "mediaKeyId": "c/",
+            "outputGroupDetails": [{"outputDetails": [{"outputFilePaths": ["s3://b/c/play.m3u8"]}]}],
+            **detail,
+        }
+    }
+    response = handler.lambda_handler(event, SimpleNamespace(request_id="req"))
+    assert response["statusCode"] == 200
+    return handler._generator.generate_thumbnails.call_args.kwargs
+
+
+@pytest.mark.parametrize(
+    "detail, expected",
+    [
+        ({}, False),
+        ({"force": True}, True),
+        ({"force": "false"}, False),
+        ({"force": "true"}, False),
+        ({"force": 1}, False),
+    ],
+)
+def test_force_only_for_boolean_true(handler, detail, expected):
+    assert invoke(handler, **detail)["force"] is expected
+
+
+def test_job_id_passed_to_generator(handler):
+    assert invoke(handler)["job_id"] == "job1"
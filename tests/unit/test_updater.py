@@ -0,0 +1,81 @@
+"""Unit tests for trick play manifest generation."""
+
+from unittest import mock
+
+import pytest
+
+from shared.config import Config
+from updater import ManifestUpdater
+
+
+@pytest.fixture
+def updater(monkeypatch):
+    monkeypatch.setattr(Config, "THUMBNAIL_INTERVAL", 10)
+    instance = ManifestUpdater.__new__(ManifestUpdater)
+    instance.config = Config
+    instance.s3 = mock.Mock()
+    return instance
+
+
+def thumbnails(count):
+    return [f"content/video123/thumbs/video123_small.{i:05d}.jpg" for i in range(1, count + 1)]
+
+
+def create_manifest(updater, count, grid, duration=None):
+    updater._create_manifest("bucket", "content/video123/", thumbnails(count), "320x180", grid, duration)
+    return updater.s3.put_object.call_args.kwargs["body"].splitlines()
+
+
+def extinf_lines(lines):
+    return [line for line in lines if line.startswith("#EXTINF")]
+
+
+def test_manifest_uses_grid_for_layout_and_durations(updater):
+    lines = create_manifest(updater, 2, 5)
+
+    assert "#EXT-X-TARGETDURATION:250" in lines
+    assert lines.count("#EXT-X-TILES:RESOLUTION=320x180,LAYOUT=5x5,DURATION=10.000") == 2
+    assert extinf_lines(lines) == ["#EXTINF:250.000,", "#EXTINF:250.000,"]
+    assert "thumbs/video123_small.00002.jpg" in lines
+    assert updater.s3.put_object.call_args.kwargs["key"] == "content/video123/thumbs_320x180.m3u8"
+
+
+def test_last_extinf_trimmed_to_media_duration(updater):
+    lines = create_manifest(updater, 3, 10, duration=2234.5)
+
+    assert extinf_lines(lines) == ["#EXTINF:1000.000,", "#EXTINF:1000.000,", "#EXTINF:234.500,"]
+    assert "#EXT-X-TARGETDURATION:1000" in lines
+
+
+def test_last_extinf_untrimmed_without_duration(updater):
+    lines = create_manifest(updater, 2, 10)
+
+    assert extinf_lines(lines) == ["#EXTINF:1000.000,", "#EXTINF:1000.000,"]
+
+
+def test_last_extinf_untrimmed_when_duration_inconsistent(updater):
+    # Duration shorter than the earlier sprites cover: keep full-length entries
+    assert extinf_lines(create_manifest(updater, 3, 10, duration=1500.0))[-1] == "#EXTINF:1000.000,"
+    assert extinf_lines(create_manifest(updater, 1, 10, duration=1000.0))[-1] == "#EXTINF:1000.000,"
+
+
+def test_single_thumbnail_layout(updater):
+    lines = create_manifest(updater, 3, 1, duration=25.0)
+
+    assert "#EXT-X-TARGETDURATION:10" in lines
+    assert "#EXT-X-TILES:RESOLUTION=320x180,LAYOUT=1x1,DURATION=10.000" in lines
+    assert extinf_lines(lines) == ["#EXTINF:10.000,", "#EXTINF:10.000,", "#EXTINF:5.000,"]
+
+
+def test_resolutions_use_their_own_grid(updater, monkeypatch):
+    monkeypatch.setattr(Config, "THUMBNAIL_TILE_GRID", 10)
+    monkeypatch.setattr(Config, "THUMBNAIL_BIG_TILE_GRID", 5)
+    updater.s3.get_object.return_value = "#EXTM3U\n"
+
+    updater.create_manifests_and_update_playlist(
+        "bucket", "content/video123/", "s3://bucket/content/video123/play.m3u8", thumbnails(1), thumbnails(1)
+    )
+
+    bodies = {call.kwargs["key"]: call.kwargs["body"] for call in updater.s3.put_object.call_args_list}
+    assert "LAYOUT=10x10" in bodies["content/video123/thumbs_320x180.m3u8"]
+    assert "LAYOUT=5x5" in bodies["content/video123/thumbs_640x360.m3u8"]